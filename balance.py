@@ -0,0 +1,94 @@
+import os
+import sys
+import csv
+import time
+import itertools
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Симуляция ничего не рисует, окно не нужно
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from simulation import make_params, run_round, POLICIES
+
+def parse_value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+def parse_sweep(items):
+    # ["INITIAL_SPEED=240,270,300", "RISK_COSTS.tree=20000,30000"] -> список наборов переопределений
+    names, values = [], []
+    for item in items:
+        name, _, raw_values = item.partition("=")
+        if not raw_values:
+            raise SystemExit(f"Ожидается ИМЯ=значение[,значение...]: {item}")
+        names.append(name.strip())
+        values.append([parse_value(v.strip()) for v in raw_values.split(",")])
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+def init_worker():
+    pygame.init()
+
+def run_task(task):
+    overrides, seed, policy = task
+    outcome = run_round(make_params(overrides), seed, policy)
+    row = dict(overrides)
+    row.update(seed=seed, policy=policy)
+    row.update(outcome)
+    return row
+
+def write_results(path, rows):
+    if path.endswith(".parquet"):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise SystemExit("Для записи .parquet нужны pandas и pyarrow; используйте .csv")
+        pd.DataFrame(rows).to_parquet(path, index=False)
+        return
+    fieldnames = []
+    for row in rows:
+        fieldnames.extend(key for key in row if key not in fieldnames)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Монте-Карло прогон раундов без отрисовки для балансировки")
+    parser.add_argument("--runs", type=int, default=100, help="раундов на каждый набор параметров")
+    parser.add_argument("--sweep", action="append", default=[],
+                        help="ИМЯ=значение[,значение...], можно несколько раз; RISK_COSTS.<риск> для стоимости риска")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="scripted")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0, help="seed первого раунда")
+    parser.add_argument("--out", default="balance_results.csv", help=".csv или .parquet")
+    args = parser.parse_args(argv)
+
+    sweep = parse_sweep(args.sweep)
+    # Ошибки в именах параметров ловятся до запуска пула, а не в каждом рабочем процессе
+    for overrides in sweep:
+        try:
+            make_params(overrides)
+        except KeyError as e:
+            raise SystemExit(e.args[0])
+
+    tasks = [(overrides, args.seed + i, args.policy) for overrides in sweep for i in range(args.runs)]
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as executor:
+        rows = list(executor.map(run_task, tasks, chunksize=max(1, len(tasks) // (args.workers * 8))))
+    elapsed = time.time() - start
+
+    write_results(args.out, rows)
+    wins = sum(row["result"] == "win" for row in rows)
+    print(f"{len(rows)} раундов за {elapsed:.1f} с ({len(rows) / elapsed * 60:.0f}/мин), "
+          f"побед: {wins / len(rows):.0%}, результаты: {args.out}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
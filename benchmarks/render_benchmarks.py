@@ -0,0 +1,307 @@
+import os
+import sys
+import json
+import time
+import math
+import platform
+import argparse
+
+# Бенчмарки работают без окна
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import numpy as np
+from config import (SCREEN_WIDTH, SCREEN_HEIGHT, LANE_YS, BUILDING_COLORS, POLICY_COLORS, POLICY_TYPES,
+                    INITIAL_HEALTH, RED)
+from utils.rng import seed_streams
+
+# Каждый бенчмарк - функция подготовки, которая возвращает функцию одной итерации.
+# Подготовка не входит в замер; прогрев убирает из замера ленивое построение кэшей
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def make_weather(weather, fill=True):
+    from sprites.background import WeatherSystem
+    weather_system = WeatherSystem()
+    weather_system.current_weather = weather
+    weather_system.weather_duration = float("inf")
+    rng = np.random.default_rng(0)
+    if fill:
+        rain, snow = weather_system.rain_drops, weather_system.snow_flakes
+        if weather == "rainy":
+            n = rain.capacity
+            rain.spawn(n, x=rng.integers(0, SCREEN_WIDTH + 1, n), y=rng.integers(0, SCREEN_HEIGHT, n),
+                       speed=rng.uniform(450, 650, n), length=rng.integers(10, 21, n))
+        elif weather == "snowy":
+            n = snow.capacity
+            snow.spawn(n, x=rng.integers(0, SCREEN_WIDTH + 1, n), y=rng.integers(0, SCREEN_HEIGHT, n),
+                       speed_y=rng.uniform(80, 130, n), speed_x=rng.uniform(-20, 20, n),
+                       size=rng.uniform(2, 4, n), angle=rng.uniform(0, 360, n), spin=rng.uniform(-90, 90, n))
+    return weather_system
+
+# --- Фон ---
+
+@benchmark("draw_ground")
+def bench_draw_ground(screen):
+    from sprites.background import draw_ground
+    weather_system = make_weather("clear", fill=False)
+    return lambda: draw_ground(screen, 0, 0, weather_system)
+
+@benchmark("sky_gradient.draw")
+def bench_sky_draw(screen):
+    from sprites.sky import SkyLayer
+    sky_layer = SkyLayer()
+    weather_system = make_weather("clear", fill=False)
+    return lambda: sky_layer.draw(screen, weather_system)
+
+@benchmark("sky_gradient.transition")
+def bench_sky_transition(screen):
+    from sprites.sky import SkyLayer
+    sky_layer = SkyLayer()
+    weather_system = make_weather("clear", fill=False)
+    weather_system.next_weather = "sunset"
+    weather_system.transition_progress = 0.5
+    return lambda: sky_layer.draw(screen, weather_system)
+
+@benchmark("sky_gradient.build")
+def bench_sky_build(screen):
+    from sprites.sky import get_sky_height
+    from utils.drawing import make_vertical_gradient
+    height = get_sky_height()
+    return lambda: make_vertical_gradient(SCREEN_WIDTH, int(height), (135, 206, 250), (255, 255, 255), height)
+
+@benchmark("sun_glow.draw")
+def bench_sun_draw(screen):
+    from sprites.sky import SunRenderer
+    sun_renderer = SunRenderer()
+    weather_system = make_weather("clear", fill=False)
+    weather_system.weather_duration = 10
+    weather_system.weather_timer = 5
+    return lambda: sun_renderer.draw(screen, weather_system)
+
+@benchmark("sun_glow.build")
+def bench_sun_build(screen):
+    from sprites.sky import SunRenderer
+    sun_renderer = SunRenderer()
+    return lambda: sun_renderer._build_sprite(255)
+
+@benchmark("BackgroundElement.draw")
+def bench_background_element(screen):
+    from sprites.background import BackgroundElement
+    element = BackgroundElement(LANE_YS[0] * 0.65, 187, 50, 100, BUILDING_COLORS, 0.7, 2)
+    weather_system = make_weather("snowy", fill=False)
+    weather_system.snow_level = 2
+    return lambda: element.draw(screen, 0, 0, weather_system)
+
+@benchmark("ParallaxBand.update_draw")
+def bench_parallax_band(screen):
+    from sprites.background import BackgroundElement, ParallaxBand
+    band = ParallaxBand([BackgroundElement(LANE_YS[0] * 0.6, 176, 40, 120, BUILDING_COLORS, 0.4, 1)
+                         for _ in range(8)])
+    weather_system = make_weather("clear", fill=False)
+
+    def run():
+        band.update(300, 1 / 60)
+        band.draw(screen, 0, 0, weather_system)
+    return run
+
+# --- Погода ---
+
+@benchmark("WeatherSystem.update.rain")
+def bench_weather_update_rain(screen):
+    weather_system = make_weather("rainy")
+    return lambda: weather_system.update(1 / 60)
+
+@benchmark("WeatherSystem.update.snow")
+def bench_weather_update_snow(screen):
+    weather_system = make_weather("snowy")
+    return lambda: weather_system.update(1 / 60)
+
+@benchmark("WeatherSystem.draw_weather.rain")
+def bench_weather_draw_rain(screen):
+    weather_system = make_weather("rainy")
+    return lambda: weather_system.draw_weather(screen)
+
+@benchmark("WeatherSystem.draw_weather.snow")
+def bench_weather_draw_snow(screen):
+    weather_system = make_weather("snowy")
+    return lambda: weather_system.draw_weather(screen)
+
+# --- Спрайты ---
+
+@benchmark("Player.draw_player_shape")
+def bench_player_shape(screen):
+    from sprites.player import Player
+    player = Player()
+
+    def run():
+        player.anim_timer += 1 / 60 * 3.5
+        player.current_tilt = 15 * math.sin(player.anim_timer)
+        player.draw_player_shape()
+    return run
+
+@benchmark("render_player_pose")
+def bench_player_pose(screen):
+    from sprites.player import render_player_pose
+    return lambda: render_player_pose(12, 1.0)
+
+@benchmark("Booster.update_image")
+def bench_booster_image(screen):
+    from sprites.obstacles import Booster
+    booster = Booster(270, POLICY_TYPES[0])
+    return lambda: booster.update_image(1 / 60)
+
+# --- Частицы ---
+
+@benchmark("create_explosion")
+def bench_create_explosion(screen):
+    from utils.particles import create_explosion
+    return lambda: create_explosion(400, 300, RED, 40, 150, 0.8)
+
+def make_particles(count):
+    from utils.particles import ParticleSystem, create_explosion
+    particles = ParticleSystem()
+    for i in range(count // 40):
+        particles.extend(create_explosion(100 + (i * 37) % 600, 100 + (i * 53) % 400, RED, 40, 150, 1e9))
+    return particles
+
+@benchmark("ParticleSystem.update")
+def bench_particles_update(screen):
+    particles = make_particles(2000)
+    return lambda: particles.update(1e-4)
+
+@benchmark("ParticleSystem.draw")
+def bench_particles_draw(screen):
+    particles = make_particles(2000)
+    return lambda: particles.draw(screen)
+
+# --- Интерфейс ---
+
+@benchmark("ui.render_timer")
+def bench_ui_timer(screen):
+    from utils.ui import render_timer
+    return lambda: render_timer(SCREEN_WIDTH, 42.5)
+
+@benchmark("ui.render_score")
+def bench_ui_score(screen):
+    from utils.ui import render_score
+    return lambda: render_score(SCREEN_WIDTH, 125000)
+
+@benchmark("ui.render_health")
+def bench_ui_health(screen):
+    from utils.ui import render_health
+    return lambda: render_health(2, INITIAL_HEALTH)
+
+@benchmark("ui.render_active_policy")
+def bench_ui_policy(screen):
+    from utils.ui import render_active_policy
+    return lambda: render_active_policy(SCREEN_WIDTH, POLICY_TYPES[0], POLICY_COLORS, 10, 40, 0)
+
+@benchmark("ui.HUD.draw")
+def bench_ui_hud(screen):
+    from utils.ui import HUD
+    hud = HUD()
+    return lambda: hud.draw(screen, 42.5, 125000, 2, INITIAL_HEALTH, POLICY_TYPES[:2], POLICY_COLORS)
+
+@benchmark("ui.draw_toast")
+def bench_ui_toast(screen):
+    from utils.ui import draw_toast
+    return lambda: draw_toast(screen, "KASKO АКТИВИРОВАН! Экономия: 50,000₽", float("inf"), 255, 0)
+
+@benchmark("ui.draw_game_over_screen")
+def bench_ui_game_over(screen):
+    from utils.ui import draw_game_over_screen
+    return lambda: draw_game_over_screen(screen, "win", 125000, (255, 255, 255))
+
+def run_benchmark(setup, screen, iterations, warmup):
+    seed_streams(0)
+    func = setup(screen)
+    for _ in range(warmup):
+        func()
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        func()
+        samples[i] = time.perf_counter_ns() - start
+    samples /= 1000.0  # мкс
+    return {
+        "iterations": iterations,
+        "min_us": round(float(samples.min()), 2),
+        "median_us": round(float(np.median(samples)), 2),
+        "p95_us": round(float(np.percentile(samples, 95)), 2),
+        "mean_us": round(float(samples.mean()), 2),
+    }
+
+def compare(results, baseline, threshold, metric="median_us"):
+    # Регрессия - метрика (по умолчанию медиана) выросла больше чем на threshold (доля) относительно базы
+    regressions = []
+    print(f"{'бенчмарк':<36}{'база, мкс':>12}{'сейчас, мкс':>14}{'изменение':>12}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<36}{'-':>12}{result[metric]:>14.2f}{'новый':>12}")
+            continue
+        ratio = result[metric] / base[metric] if base[metric] > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  РЕГРЕССИЯ"
+            regressions.append(name)
+        print(f"{name:<36}{base[metric]:>12.2f}{result[metric]:>14.2f}{ratio - 1:>+12.1%}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Микро-бенчмарки горячих путей отрисовки")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--filter", default="", help="запускать только бенчмарки, в имени которых есть эта строка")
+    parser.add_argument("--out", help="записать результаты в JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="сравнить с сохранённым JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="допустимый рост метрики (доля)")
+    parser.add_argument("--metric", choices=["min_us", "median_us", "p95_us"], default="median_us",
+                        help="по какой метрике сравнивать с базой")
+    parser.add_argument("--list", action="store_true", help="показать список бенчмарков")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if args.filter in name:
+            results[name] = run_benchmark(setup, screen, args.iterations, args.warmup)
+            if not args.compare:
+                r = results[name]
+                print(f"{name:<36} min {r['min_us']:>9.2f}  median {r['median_us']:>9.2f}  p95 {r['p95_us']:>9.2f} мкс")
+
+    if args.out:
+        report = {
+            "meta": {"python": platform.python_version(), "pygame": pygame.version.ver,
+                     "machine": platform.machine(), "iterations": args.iterations},
+            "results": results,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.metric)
+        if regressions:
+            print(f"Регрессии: {len(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,9 +1,28 @@
+import os
 import pygame
 
 # --- Константы ---
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+SIM_HZ = 120  # Частота фиксированного шага симуляции
+MAX_FRAME_TIME = 0.25  # Дольше этого кадр не догоняется шагами симуляции (защита от спирали отставания)
+RENDER_UNCAPPED = False  # Рисовать без ограничения FPS; игра от этого не меняется
+
+# Отрисовка
+RENDER_MODE = "full"  # "full" - полная перерисовка и flip, "dirty" - обновление только изменившихся прямоугольников
+DIRTY_TILE_SIZE = 32  # Размер клетки сетки грязных областей в пикселях
+DIRTY_RECT_MAX_COVERAGE = 0.6  # При большей доле грязной площади кадр выводится целиком
+
+# Кэш запечённых поверхностей на диске (utils/assets.py)
+ASSET_CACHE_ENABLED = True
+ASSET_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_cache")
+
+# Профайлер кадра
+PROFILER_TOGGLE_KEY = pygame.K_F3  # Показать/скрыть оверлей со временем стадий кадра
+PROFILER_WINDOW = 240  # Кадров в скользящем окне для среднего и p99
+PROFILER_OVERLAY_REFRESH_SEC = 0.25
+PROFILER_TRACE_MAX_EVENTS = 500000  # Предел событий в Chrome trace
 
 # Цвета
 WHITE = (255, 255, 255)
@@ -83,10 +102,23 @@ WEATHER_TYPES = {
     }
 }
 
+# Ёмкость осадков (можно увеличить для сильных бурь)
+WEATHER_MAX_RAIN_DROPS = 350
+WEATHER_MAX_SNOW_FLAKES = 400
+SNOW_ANGLE_STEPS = 24      # Количество заранее повернутых спрайтов снежинки
+SNOW_SIZE_BUCKETS = 3      # Количество размеров снежинок
+WEATHER_RAIN_SHEET = False  # Рисовать дождь прокручиваемыми слоями вместо отдельных капель
+RAIN_SHEET_LAYERS = 3
+
 # Цвета фона
 SKY_COLOR_TOP = WEATHER_TYPES["clear"]["sky_top"]
 SKY_COLOR_BOTTOM = WEATHER_TYPES["clear"]["sky_bottom"]
 
+# Звездное небо
+STAR_COUNT = 100
+STAR_LAYERS = 3  # Количество слоев параллакса звезд
+SUN_FADE_LEVELS = 32  # Количество заранее собранных уровней затухания солнца
+
 # Цвета земли (оставляем как есть)
 GROUND_COLOR_TOP = (80, 160, 40)      # Верхний слой земли (трава)
 GROUND_COLOR_BOTTOM = (60, 120, 30)   # Нижний слой земли
@@ -94,26 +126,50 @@ GROUND_COLOR_BOTTOM = (60, 120, 30)   # Нижний слой земли
 # Цвета зданий
 BUILDING_COLORS = [(100, 100, 120), (120, 120, 140), (80, 80, 100), (140, 140, 160)]
 WINDOW_COLOR = (200, 200, 255, 100)  # Полупрозрачные окна
+PARALLAX_STRIP_MARGIN = 256  # Невидимый запас полосы зданий; не меньше максимальной ширины здания (250)
 ROAD_COLOR = (70, 70, 70)
 ROAD_LINE_COLOR = (220, 220, 0)
+ROAD_MARKING_SCROLL_FACTOR = 1 / 6  # Разметка едет медленнее мира, как раньше: world_speed * 10 px/с при скорости в px/кадр
+GROUND_CROSSFADE_SEC = 1.0  # Длительность плавной смены земли при изменении уровня снега
 
 UI_TEXT_COLOR = (230, 230, 230)
 UI_BG_COLOR = (30, 30, 30, 180)  # Полупрозрачный фон для UI
 TOAST_TEXT_COLOR = WHITE
 TOAST_BG_COLOR = (0, 0, 0, 200)
 
+# Кэши шрифтов и текста
+FONT_CACHE_SIZE = 32    # Максимум объектов Font в LRU-кэше
+TEXT_CACHE_SIZE = 256   # Максимум отрендеренных строк в LRU-кэше
+PANEL_CACHE_SIZE = 64                # Максимум скруглённых панелей в LRU-кэше
+PANEL_CACHE_MAX_BYTES = 2 * 1024 * 1024  # Предел памяти под кэш панелей
+
+# Частицы
+PARTICLE_CAPACITY = 16384  # Максимум одновременно живых частиц
+PARTICLE_COLOR_STEP = 8    # Шаг квантования цвета спрайтов частиц (1 - без квантования)
+PARTICLE_ADDITIVE_JETPACK = True  # Аддитивное смешивание для пламени джетпака
+
 # Параметры игры
 LANE_YS = [SCREEN_HEIGHT * 0.58, SCREEN_HEIGHT * 0.73, SCREEN_HEIGHT * 0.88]
 PLAYER_START_X = 150
-INITIAL_SPEED = 4.5
-SPEED_INCREMENT = 0.2
+INITIAL_SPEED = 270   # Скорость мира, px/с
+SPEED_INCREMENT = 12  # Прибавка скорости, px/с
+OBSTACLE_SPAWN_DELAY = 1.8        # Базовая задержка между препятствиями, сек
+BOOSTER_SPAWN_DELAY_FACTOR = 2.2  # Задержка бустеров относительно задержки препятствий
+MIN_OBSTACLE_SPAWN_DELAY = 0.5
+MIN_BOOSTER_SPAWN_DELAY = 1.0
 SPEED_INCREMENT_INTERVAL_SEC = 10
 GAME_DURATION_SEC = 90
 INITIAL_HEALTH = 3
 
 PLAYER_SIZE = (35, 55)
+PLAYER_TILT_STEP = 2          # Шаг квантования наклона игрока в градусах (меньше - плавнее, но больше кадров)
+PLAYER_EYE_PHASES = 16        # Количество фаз анимации глаз
+PLAYER_POSE_CACHE_SIZE = 400  # Максимум кадров игрока в кэше
 OBSTACLE_BASE_SIZE = 50
 BOOSTER_RADIUS = 20
+BOOSTER_ANIM_FRAMES = 24  # Кадров в цикле пульсации бустера
+OBSTACLE_POOL_SIZE = 32   # Максимум свободных препятствий, хранимых для переиспользования
+BOOSTER_POOL_SIZE = 16    # Максимум свободных бустеров, хранимых для переиспользования
 
 # Типы полисов и рисков
 POLICY_COLORS = {"kasko": GREEN, "dms": CYAN, "property": YELLOW, "travel": MAGENTA}
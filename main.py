@@ -1,18 +1,31 @@
 import pygame
+import os
 import sys
 import time
 import random
-import math
+import argparse
 
 from config import *
-from sprites.player import Player
-from sprites.obstacles import Obstacle, Booster
-from sprites.background import BackgroundElement, WeatherSystem, draw_ground
-from utils.particles import create_explosion, apply_screen_shake, update_screen_shake
-from utils.ui import (draw_timer, draw_score, draw_health, draw_active_policy,
-                     draw_toast, draw_game_over_screen)
-
-def game():
+from simulation import GameSimulation, run_replay
+from sprites.background import (BackgroundElement, ParallaxBand, WeatherSystem, GroundLayer, get_ground_geometry,
+                                get_road_top, draw_road, draw_road_markings, get_road_marking_rects)
+from sprites.sky import SkyLayer, SunRenderer, StarField
+from utils.assets import prepare_assets, bake_assets
+from utils.particles import (ParticleSystem, create_explosion, apply_screen_shake, update_screen_shake,
+                             is_screen_shaking, reset_screen_shake)
+from utils.profiler import FrameProfiler
+from utils.render import DirtyRectTracker, CachedBackground
+from utils.replay import Replay, params_checksum
+from utils.rng import seed_streams
+from utils.ui import HUD, draw_toast, draw_game_over_screen, get_toast_rect
+
+KEY_ACTIONS = {
+    pygame.K_UP: "up", pygame.K_w: "up", pygame.K_LEFT: "up", pygame.K_a: "up",
+    pygame.K_DOWN: "down", pygame.K_s: "down", pygame.K_RIGHT: "down", pygame.K_d: "down",
+    pygame.K_SPACE: "jump",
+}
+
+def game(record_path=None, replay=None, compress_record=False, trace_path=None):
     # Инициализация Pygame
     pygame.init()
     pygame.font.init()
@@ -21,173 +34,193 @@ def game():
     pygame.display.set_caption("Risk Rush Deluxe - ЭНЕРГОГАРАНТ (No Assets Edition)")
     clock = pygame.time.Clock()
 
-    # Игровые переменные
-    world_speed = INITIAL_SPEED
-    score = 0
-    health = INITIAL_HEALTH
-    active_policies = []
-    game_start_time = time.time()
-    last_speed_up_time = game_start_time
+    # Процедурные поверхности берутся из кэша на диске (запекается при первом запуске и смене конфигурации)
+    if ASSET_CACHE_ENABLED:
+        prepare_assets()
+
+    # Игровые правила (спавн, скорость, столкновения, очки) живут в симуляции
+    simulation = GameSimulation()
+    if replay is not None and (replay.sim_hz != SIM_HZ or replay.params_crc != params_checksum(simulation.params)):
+        raise ValueError("Запись сделана с другой частотой симуляции или параметрами баланса")
+    recorder = None
+
+    # Профайлер стадий кадра: оверлей по PROFILER_TOGGLE_KEY, Chrome trace при trace_path
+    profiler = FrameProfiler(trace_path=trace_path)
+    simulation.profiler = profiler
+
+    def save_recording():
+        nonlocal recorder
+        if recorder is not None:
+            recorder.finish(simulation.steps)
+            recorder.save(record_path, compress_record)
+            print(f"Запись сохранена: {record_path} ({len(recorder.actions)} действий)")
+            recorder = None
+
+    def shutdown():
+        save_recording()
+        if trace_path:
+            profiler.save_trace()
+            print(f"Трасса сохранена: {trace_path}")
+        pygame.quit()
+        sys.exit()
+    player = simulation.player
+    all_sprites = simulation.all_sprites
+
     toast_message = None
     toast_end_time = 0
     toast_alpha = 0
     shown_first_collision_tips = set()
-    particles = []
-
-    # Создание спрайтов
-    player = Player()
-    all_sprites = pygame.sprite.Group(player)
-    obstacles_group = pygame.sprite.Group()
-    boosters_group = pygame.sprite.Group()
-
-    # Создание фоновых элементов
-    background_elements = []
-    # Дальние здания (маленькие)
-    for _ in range(10):
-        background_elements.append(BackgroundElement(LANE_YS[0] * 0.55, 143, 30, 80, BUILDING_COLORS, 0.2, 0))
-    # Средние здания
-    for _ in range(8):
-        background_elements.append(BackgroundElement(LANE_YS[0] * 0.6, 176, 40, 120, BUILDING_COLORS, 0.4, 1))
-    # Ближние здания (большие)
-    for _ in range(6):
-        background_elements.append(BackgroundElement(LANE_YS[0] * 0.65, 187, 50, 100, BUILDING_COLORS, 0.7, 2))
-
-    background_elements.sort(key=lambda el: el.z_order)
-
-    # Создание звезд
-    stars = []
-    for _ in range(100):
-        stars.append({
-            'x': random.randint(0, SCREEN_WIDTH),
-            'y': random.randint(0, int(LANE_YS[0] * 0.8)),
-            'size': random.uniform(0.5, 1.5),
-            'speed_factor': random.uniform(0.05, 0.15)
-        })
-
-    # Таймеры спавна
-    base_obstacle_spawn_delay = 1.8
-    obstacle_spawn_delay = base_obstacle_spawn_delay
-    obstacle_spawn_timer = obstacle_spawn_delay * 0.8
-
-    base_booster_spawn_delay = base_obstacle_spawn_delay * 2.2
-    booster_spawn_delay = base_booster_spawn_delay
-    booster_spawn_timer = booster_spawn_delay * 0.5
-
-    game_state = "playing"
+    particles = ParticleSystem()
+
+    # Создание фоновых элементов: каждая полоса глубины - одна прокручиваемая полоса зданий
+    parallax_bands = [
+        # Дальние здания (маленькие)
+        ParallaxBand([BackgroundElement(LANE_YS[0] * 0.55, 143, 30, 80, BUILDING_COLORS, 0.2, 0) for _ in range(10)]),
+        # Средние здания
+        ParallaxBand([BackgroundElement(LANE_YS[0] * 0.6, 176, 40, 120, BUILDING_COLORS, 0.4, 1) for _ in range(8)]),
+        # Ближние здания (большие)
+        ParallaxBand([BackgroundElement(LANE_YS[0] * 0.65, 187, 50, 100, BUILDING_COLORS, 0.7, 2) for _ in range(6)]),
+    ]
+
+    # Небо и звезды
+    sky_layer = SkyLayer()
+    sun_renderer = SunRenderer()
+    star_field = StarField()
+
     running = True
 
     # Создание погодной системы
     weather_system = WeatherSystem()
-
+    ground_layer = GroundLayer()
+    hud = HUD()
+
+    # Режим грязных прямоугольников: кэш статичного фона и сетка изменившихся областей.
+    # Звезды движутся, поэтому в кэш не входят и рисуются поверх него только в грязных областях
+    def draw_static_background(surface):
+        sky_layer.draw(surface, weather_system)
+        sun_renderer.draw(surface, weather_system)
+        ground_layer.draw(surface, 0, 0, weather_system, update=False)
+        draw_road(surface)
+
+    dirty_tracker = DirtyRectTracker((SCREEN_WIDTH, SCREEN_HEIGHT))
+    background = CachedBackground((SCREEN_WIDTH, SCREEN_HEIGHT), draw_static_background)
+    background_keys = {"sky": None, "sun": None, "sun_rect": None, "ground": None}
+
+    # Фиксированный шаг симуляции; отрисовка интерполирует между двумя последними шагами
+    sim_dt = 1.0 / SIM_HZ
+    sim_accumulator = 0.0
+    render_alpha = 1.0
+
+    def start_round():
+        # Новый раунд без пересоздания окна, фона, кэшей и спрайтов: сбрасывается только состояние раунда.
+        # Вся случайность идёт из именованных потоков с общим seed: при записи сохраняются
+        # seed и действия игрока, а воспроизведение повторяет раунд шаг в шаг.
+        # Погода и смена земли идут на том же фиксированном шаге и повторяются вместе с симуляцией;
+        # частицы, параллакс и тряска идут по реальному dt кадра и совпадают с записью лишь приблизительно
+        nonlocal recorder, toast_message, toast_end_time, toast_alpha, sim_accumulator, render_alpha
+        seed = replay.seed if replay is not None else random.randrange(2 ** 63)
+        seed_streams(seed)
+        simulation.reset()
+        if replay is not None:
+            replay.rewind()
+        recorder = Replay(seed, SIM_HZ, params_checksum(simulation.params)) if record_path else None
+
+        toast_message = None
+        toast_end_time = 0
+        toast_alpha = 0
+        shown_first_collision_tips.clear()
+        particles.clear()
+        # Каждый раунд начинается с ясной погоды, без осадков и тряски, как при первом запуске
+        weather_system.reset()
+        ground_layer.reset()
+        reset_screen_shake()
+        dirty_tracker.force_full()
+        sim_accumulator = 0.0
+        render_alpha = 1.0
+
+    start_round()
+
+    # Состояния игры: simulation.state "playing" -> "win" / "game_over" -> (R) start_round() -> "playing"
     while running:
-        dt = clock.tick(FPS) / 1000.0
-        dt = min(dt, 0.05)
+        frame_time = clock.tick(0 if RENDER_UNCAPPED else FPS) / 1000.0
+        sim_accumulator += min(frame_time, MAX_FRAME_TIME)
+        # Косметические эффекты (частицы, погода, фон) обновляются раз в кадр
+        dt = min(frame_time, 0.05)
+        profiler.begin_frame()
 
         current_offset_x, current_offset_y = update_screen_shake(dt)
+        game_events = []
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-                pygame.quit()
-                sys.exit()
-
-            if game_state == "playing":
-                if event.type == pygame.KEYDOWN:
-                    if event.key in [pygame.K_UP, pygame.K_w]:
-                        player.change_lane(-1)
-                    if event.key in [pygame.K_DOWN, pygame.K_s]:
-                        player.change_lane(1)
-                    if event.key in [pygame.K_LEFT, pygame.K_a]:
-                        player.change_lane(-1)
-                    if event.key in [pygame.K_RIGHT, pygame.K_d]:
-                        player.change_lane(1)
-                    if event.key == pygame.K_SPACE:
-                        particles.extend(player.jump())
-            elif game_state in ["win", "game_over"]:
+                shutdown()
+
+            if event.type == pygame.KEYDOWN and event.key == PROFILER_TOGGLE_KEY:
+                profiler.toggle_overlay()
+                dirty_tracker.force_full()
+
+            if simulation.state == "playing":
+                if event.type == pygame.KEYDOWN and replay is None:
+                    action = KEY_ACTIONS.get(event.key)
+                    if action:
+                        if recorder is not None:
+                            recorder.record(simulation.steps, action)
+                        game_events.extend(simulation.handle_action(action))
+            elif simulation.state in ["win", "game_over"]:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:
-                        game()
-                        return
+                        # Рестарт - обычная игра без записи и воспроизведения, как при первом запуске
+                        replay = record_path = None
+                        start_round()
                     if event.key == pygame.K_q:
                         running = False
-                        pygame.quit()
-                        sys.exit()
+                        shutdown()
 
         if not running:
             break
 
-        if game_state == "playing":
-            current_game_time = time.time()
-
-            # Обновление скорости игры
-            if current_game_time - last_speed_up_time > SPEED_INCREMENT_INTERVAL_SEC:
-                world_speed += SPEED_INCREMENT
-                last_speed_up_time = current_game_time
-                obstacle_spawn_delay = max(0.5, (INITIAL_SPEED / world_speed) * base_obstacle_spawn_delay)
-                booster_spawn_delay = max(1.0, obstacle_spawn_delay * 2.0)
-
-            # Спавн препятствий
-            obstacle_spawn_timer += dt
-            if obstacle_spawn_timer >= obstacle_spawn_delay:
-                risk_type = random.choice(RISK_TYPES)
-                obs = Obstacle(world_speed, risk_type)
-                all_sprites.add(obs)
-                obstacles_group.add(obs)
-                obstacle_spawn_timer = random.uniform(-0.1, 0.1)
-
-            # Спавн бустеров
-            booster_spawn_timer += dt
-            if booster_spawn_timer >= booster_spawn_delay:
-                policy_type = random.choice(POLICY_TYPES)
-                boost = Booster(world_speed, policy_type)
-                all_sprites.add(boost)
-                boosters_group.add(boost)
-                booster_spawn_timer = random.uniform(-0.2, 0.2)
-
-            # Обновление игрока и создание частиц
-            new_particles = player.update(dt)
-            if new_particles:
-                particles.extend(new_particles)
-
-            # Обновление остальных спрайтов
-            for sprite in all_sprites:
-                if sprite != player:
-                    sprite.update(world_speed, dt)
-
-            # Обновление фона
-            for bg_el in background_elements:
-                bg_el.update(world_speed, dt)
-            for star in stars:
-                star['x'] -= world_speed * star['speed_factor']
-                if star['x'] < 0:
-                    star['x'] = SCREEN_WIDTH
-                    star['y'] = random.randint(0, int(LANE_YS[0] * 0.8))
-
-            # Проверка коллизий с бустерами
-            for booster in pygame.sprite.spritecollide(player, boosters_group, True):
-                if booster.policy_type not in active_policies:
-                    active_policies.append(booster.policy_type)
-                    toast_message = f"{booster.policy_type.upper()} АКТИВИРОВАН!"
+        profiler.lap("events")
+
+        if simulation.state == "playing":
+            while sim_accumulator >= sim_dt and simulation.state == "playing":
+                if replay is not None:
+                    if replay.end_step is not None and simulation.steps >= replay.end_step:
+                        sim_accumulator = 0.0
+                        break
+                    for action in replay.pop_actions(simulation.steps):
+                        game_events.extend(simulation.handle_action(action))
+                    profiler.lap("replay input")
+                game_events.extend(simulation.step(sim_dt))
+                profiler.lap("simulation")
+                weather_system.update(sim_dt)
+                profiler.lap("weather update")
+                ground_layer.update(SCREEN_WIDTH, weather_system, sim_dt)
+                profiler.lap("ground update")
+                sim_accumulator -= sim_dt
+            if simulation.state != "playing":
+                save_recording()
+            render_alpha = min(1.0, sim_accumulator / sim_dt)
+
+            for game_event in game_events:
+                kind = game_event[0]
+                if kind == "particles":
+                    particles.extend(game_event[1])
+                elif kind == "booster":
+                    _, policy, (x, y) = game_event
+                    toast_message = f"{policy.upper()} АКТИВИРОВАН!"
                     toast_end_time = time.time() + 2.0
                     toast_alpha = 255
-                    particles.extend(create_explosion(booster.rect.centerx, booster.rect.centery,
-                                                   POLICY_COLORS.get(booster.policy_type, GREEN), 30, 120, 0.6))
-
-            # Проверка коллизий с препятствиями
-            for obstacle in pygame.sprite.spritecollide(player, obstacles_group, True):
-                risk = obstacle.risk_type
-                cost = RISK_COSTS.get(risk, 0)
-                protection = RISK_PROTECTION.get(risk)
-
-                if protection in active_policies:
-                    score += cost
-                    active_policies.remove(protection)
+                    particles.extend(create_explosion(x, y, POLICY_COLORS.get(policy, GREEN), 30, 120, 0.6))
+                elif kind == "protected":
+                    _, risk, protection, (x, y) = game_event
+                    cost = simulation.params["RISK_COSTS"].get(risk, 0)
                     toast_message = f"{protection.upper() if protection else ''} спас! Экономия: {cost:,}₽"
                     toast_end_time = time.time() + 2.5
                     toast_alpha = 255
-                    particles.extend(create_explosion(obstacle.rect.centerx, obstacle.rect.centery, GREEN, 25, 100, 0.7))
-                else:
-                    health -= 1
+                    particles.extend(create_explosion(x, y, GREEN, 25, 100, 0.7))
+                elif kind == "damage":
+                    risk = game_event[1]
                     apply_screen_shake(0.3, 8)
                     particles.extend(create_explosion(player.rect.centerx, player.rect.centery, RED, 40, 150, 0.8, gravity=200))
 
@@ -200,164 +233,210 @@ def game():
                         toast_message = f"Убыток! Бюджет -1"
                         toast_end_time = time.time() + 2.0
                     toast_alpha = 255
+            profiler.lap("game events")
 
-                if health <= 0:
-                    game_state = "game_over"
-                    break
-
-            if current_game_time - game_start_time >= GAME_DURATION_SEC and game_state == "playing":
-                game_state = "win"
-
-            # Обновление погоды
-            weather_system.update(dt)
+            # Обновление фона
+            for band in parallax_bands:
+                band.update(simulation.world_speed, dt)
+            star_field.update(simulation.world_speed, dt)
+            profiler.lap("background update")
 
         # Отрисовка
         # Получаем текущие цвета неба из погодной системы
         sky_color_top, sky_color_bottom = weather_system.get_current_sky_colors()
-        
-        # Вычисляем позицию дороги
-        road_rect_y = LANE_YS[0] - PLAYER_SIZE[1] * 0.8
-        
-        # Градиент неба (только до дороги)
-        for y_grad in range(int(road_rect_y)):
-            ratio = y_grad / road_rect_y
-            color = (
-                int(sky_color_top[0] * (1 - ratio) + sky_color_bottom[0] * ratio),
-                int(sky_color_top[1] * (1 - ratio) + sky_color_bottom[1] * ratio),
-                int(sky_color_top[2] * (1 - ratio) + sky_color_bottom[2] * ratio)
-            )
-            pygame.draw.line(screen, color, (0 + current_offset_x, y_grad + current_offset_y),
-                           (SCREEN_WIDTH + current_offset_x, y_grad + current_offset_y))
+        road_scroll = simulation.get_road_scroll(render_alpha)
+        stars_visible = WEATHER_TYPES[weather_system.current_weather]["stars_visible"]
 
-        # Солнце (только если оно видимо в текущую погоду и нет перехода, и не рассвет)
-        current_weather = WEATHER_TYPES[weather_system.current_weather]
-        if weather_system.next_weather is None and current_weather["sun_visible"] and weather_system.current_weather != "sunrise":
-            # Вычисляем позицию солнца с учетом прогресса текущей погоды
-            base_sun_position = current_weather["sun_position"]
-            progress = weather_system.weather_timer / weather_system.weather_duration
-            if weather_system.current_weather == "clear":
-                arc_radius = SCREEN_WIDTH * 0.35
-                cx = SCREEN_WIDTH // 2
-                cy = road_rect_y * 0.8
-                theta = math.pi - progress * math.pi
-                sun_x = cx + arc_radius * math.cos(theta)
-                sun_y = cy - arc_radius * math.sin(theta)
-                sun_alpha = 255
-            elif weather_system.current_weather == "sunset":
-                if progress < 0.8:
-                    sun_x = SCREEN_WIDTH * 0.95
-                    sun_y = road_rect_y * 0.85
-                    sun_alpha = 255
-                else:
-                    final_progress = (progress - 0.8) / 0.2
-                    sun_x = SCREEN_WIDTH * 0.95
-                    sun_y = road_rect_y * (0.85 + final_progress * 0.15)
-                    sun_alpha = int(255 * (1 - final_progress))
+        # Спрайты за правым краем экрана не рисуются
+        visible_sprites = [(sprite.image, sprite.get_render_rect(render_alpha)) for sprite in all_sprites]
+        visible_sprites = [(image, rect) for image, rect in visible_sprites if rect.left < SCREEN_WIDTH]
+
+        time_left = simulation.get_time_left()
+        profiler.lap("render prep")
+
+        # Частицы
+        particles.update(dt)
+        profiler.lap("particles")
+        if profiler.overlay_visible:
+            for name, stats in simulation.get_pool_stats().items():
+                profiler.set_info(f"пул {name}", f"{stats['active']} акт. / пик {stats['high_water']}, "
+                                                 f"создано {stats['created']}, повторно {stats['reused']}")
+        profiler.update_overlay()
+        profiler.skip()
+
+        shaking = is_screen_shaking() or (current_offset_x, current_offset_y) != (0, 0)
+        if RENDER_MODE == "dirty" and not shaking and simulation.state == "playing":
+            # Статичные слои перерисовываются в кэше только там, где изменились
+            sun_state = sun_renderer.get_state(weather_system)
+            sun_rect = None
+            if sun_state is not None and sun_state[2] > 0:
+                sun_sprite = sun_renderer.get_sprite(sun_state[2])
+                sun_rect = sun_sprite.get_rect(center=(int(sun_state[0]), int(sun_state[1])))
+                sun_state = (sun_rect.topleft, round(sun_state[2] * sun_renderer.fade_levels / 255))
+            sky_key = (weather_system.current_weather, weather_system.next_weather,
+                       int(255 * weather_system.transition_progress) if weather_system.next_weather else 0)
+            ground_key = ground_layer.get_state_key()
+
+            background_changes = []
+            if dirty_tracker.full:
+                background_changes.append(dirty_tracker.screen_rect)
             else:
-                sun_x = SCREEN_WIDTH * 0.8
-                sun_y = road_rect_y * base_sun_position
-                sun_alpha = 255
-
-            sun_radius = 40
-            # Свечение
-            for r in range(int(sun_radius * 1.5), int(sun_radius * 0.8), -2):
-                alpha = int((255 * (1 - (r - sun_radius * 0.8) / (sun_radius * 0.7)) * sun_alpha) / 255)
-                alpha = max(0, min(255, alpha))
-                glow_surface = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
-                pygame.draw.circle(glow_surface, (*YELLOW, alpha), (r, r), r)
-                screen.blit(glow_surface, 
-                          (sun_x - r + current_offset_x, 
-                           sun_y - r + current_offset_y))
-            # Само солнце (теперь с поддержкой альфы)
-            sun_surf_size = int(sun_radius * 1.6)
-            sun_alpha = max(0, min(255, sun_alpha))
-            sun_surface = pygame.Surface((sun_surf_size, sun_surf_size), pygame.SRCALPHA)
-            pygame.draw.circle(
-                sun_surface,
-                (*YELLOW, sun_alpha),
-                (sun_surf_size // 2, sun_surf_size // 2),
-                int(sun_radius * 0.8)
-            )
-            screen.blit(
-                sun_surface,
-                (int(sun_x + current_offset_x - sun_surf_size // 2), int(sun_y + current_offset_y - sun_surf_size // 2))
-            )
+                if sky_key != background_keys["sky"]:
+                    background_changes.append(pygame.Rect(0, 0, SCREEN_WIDTH, int(get_road_top()) + 1))
+                elif sun_state != background_keys["sun"]:
+                    background_changes.extend(rect for rect in (background_keys["sun_rect"], sun_rect) if rect)
+                if ground_key != background_keys["ground"]:
+                    ground_y, ground_height = get_ground_geometry()
+                    background_changes.append(pygame.Rect(0, ground_y, SCREEN_WIDTH, ground_height))
+            background_keys.update(sky=sky_key, sun=sun_state, sun_rect=sun_rect, ground=ground_key)
+            background.redraw(background_changes)
+            for rect in background_changes:
+                dirty_tracker.mark(rect)
+            profiler.lap("background cache")
+
+            # Всё, что двигается в этом кадре
+            for band in parallax_bands:
+                dirty_tracker.mark(band.rect)
+            for rect in get_road_marking_rects():
+                dirty_tracker.mark(rect)
+            for _, rect in visible_sprites:
+                dirty_tracker.mark(rect)
+            dirty_tracker.mark_points(particles.x[:particles.count], particles.y[:particles.count], 10)
+            star_xs, star_ys = star_field.get_moved_points()
+            if stars_visible:
+                dirty_tracker.mark_points(star_xs, star_ys, 2)
+            if len(weather_system.rain_drops) or len(weather_system.snow_flakes):
+                dirty_tracker.mark(dirty_tracker.screen_rect)
+            for rect in hud.update(SCREEN_WIDTH, time_left, simulation.score, simulation.health, INITIAL_HEALTH,
+                                   simulation.active_policies, POLICY_COLORS):
+                dirty_tracker.mark(rect)
+            toast_rect = get_toast_rect(screen, toast_message)
+            if toast_rect is not None and (toast_alpha > 0 or time.time() < toast_end_time):
+                dirty_tracker.mark(toast_rect.inflate(2, 2))
+            overlay_rect = profiler.get_overlay_rect(screen)
+            if overlay_rect is not None:
+                dirty_tracker.mark(overlay_rect)
+
+            # Полупрозрачные виджеты HUD перерисовываются целиком, если их задело хоть немного
+            dirty_rects = dirty_tracker.get_rects()
+            for _ in range(2):
+                for widget in hud.get_widgets():
+                    if widget.rect is not None and widget.rect.collidelist(dirty_rects) != -1:
+                        dirty_tracker.mark(widget.rect)
+                dirty_rects = dirty_tracker.get_rects()
+            profiler.lap("dirty rects")
+
+            background.restore(screen, dirty_rects)
+            if stars_visible:
+                star_field.draw_rects(screen, dirty_rects, get_ground_geometry()[0])
+            profiler.lap("sky")
+            for band in parallax_bands:
+                band.draw(screen, 0, 0, weather_system)
+            profiler.lap("buildings")
+            draw_road_markings(screen, road_scroll)
+            profiler.lap("road")
+            screen.blits(visible_sprites, doreturn=False)
+            profiler.lap("sprites")
+            particles.draw(screen)
+            profiler.lap("particles")
+            weather_system.draw_weather(screen)
+            profiler.lap("weather draw")
+            hud.draw_widgets(screen, dirty_rects)
+            toast_alpha = draw_toast(screen, toast_message, toast_end_time, toast_alpha, time.time())
+            profiler.lap("HUD")
+            profiler.draw_overlay(screen)
+            profiler.skip()
+
+            dirty_tracker.end_frame(dirty_rects)
+            if dirty_rects == [dirty_tracker.screen_rect]:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
+            profiler.lap("flip")
+            profiler.end_frame()
+            continue
+
+        # Полная перерисовка: после неё кэш фона и грязные области строятся заново
+        dirty_tracker.force_full()
+
+        # Градиент неба (только до дороги)
+        sky_layer.draw(screen, weather_system, current_offset_x, current_offset_y)
 
         # Звезды (только если они видимы в текущую погоду)
-        if WEATHER_TYPES[weather_system.current_weather]["stars_visible"]:
-            for star in stars:
-                if star['y'] < road_rect_y:  # Рисуем звезды только в небе
-                    pygame.draw.circle(screen, WHITE, (int(star['x'] + current_offset_x), int(star['y'] + current_offset_y)),
-                                     int(star['size']))
+        if stars_visible:
+            star_field.draw(screen, current_offset_x, current_offset_y)
+        profiler.lap("sky")
+
+        # Солнце (только если оно видимо в текущую погоду и нет перехода, и не рассвет)
+        sun_renderer.draw(screen, weather_system, current_offset_x, current_offset_y)
+        profiler.lap("sun")
 
         # Земля (рисуем до зданий)
-        draw_ground(screen, current_offset_x, current_offset_y, weather_system)
+        ground_layer.draw(screen, current_offset_x, current_offset_y, weather_system, update=False)
+        profiler.lap("ground")
 
         # Фоновые здания
-        for bg_el in background_elements:
-            bg_el.draw(screen, current_offset_x, current_offset_y, weather_system)
-
-        # Дорога
-        pygame.draw.rect(screen, ROAD_COLOR, (
-            0 + current_offset_x, road_rect_y + current_offset_y, SCREEN_WIDTH, SCREEN_HEIGHT - road_rect_y))
-
-        # Разметка
-        line_y_center = (LANE_YS[0] + LANE_YS[1]) / 2 + current_offset_y
-        line_y_bottom = (LANE_YS[1] + LANE_YS[2]) / 2 + current_offset_y
-
-        segment_length = 60
-        gap_length = 40
-        total_pattern_length = segment_length + gap_length
-        start_x_offset = int(((time.time() * world_speed * 10) % total_pattern_length) * -1)
-
-        for x_pos in range(start_x_offset, SCREEN_WIDTH, total_pattern_length):
-            pygame.draw.line(screen, ROAD_LINE_COLOR, (x_pos + current_offset_x, line_y_center),
-                           (x_pos + segment_length + current_offset_x, line_y_center), 5)
-            pygame.draw.line(screen, ROAD_LINE_COLOR, (x_pos + current_offset_x, line_y_bottom),
-                           (x_pos + segment_length + current_offset_x, line_y_bottom), 5)
-
-        # Границы дороги
-        pygame.draw.rect(screen, (150, 150, 150),
-                        (0 + current_offset_x, road_rect_y + current_offset_y - 5, SCREEN_WIDTH, 5))
-        pygame.draw.rect(screen, (150, 150, 150),
-                        (0 + current_offset_x, LANE_YS[-1] + PLAYER_SIZE[1] * 0.2 + current_offset_y, SCREEN_WIDTH, 5))
+        for band in parallax_bands:
+            band.draw(screen, current_offset_x, current_offset_y, weather_system)
+        profiler.lap("buildings")
+
+        # Дорога и разметка
+        draw_road(screen, current_offset_x, current_offset_y)
+        draw_road_markings(screen, road_scroll, current_offset_x, current_offset_y)
+        profiler.lap("road")
 
         # Спрайты
-        for sprite in all_sprites:
-            screen.blit(sprite.image, sprite.rect.move(current_offset_x, current_offset_y))
+        for image, rect in visible_sprites:
+            screen.blit(image, rect.move(current_offset_x, current_offset_y))
+        profiler.lap("sprites")
 
         # Частицы
-        active_particles = []
-        for p in particles:
-            if p.update(dt):
-                p.draw(screen, current_offset_x, current_offset_y)
-                active_particles.append(p)
-        particles = active_particles
+        particles.draw(screen, current_offset_x, current_offset_y)
+        profiler.lap("particles")
 
         # Погодные эффекты
         weather_system.draw_weather(screen, current_offset_x, current_offset_y)
+        profiler.lap("weather draw")
 
         # UI
-        elapsed_time = time.time() - game_start_time
-        time_left = max(0, GAME_DURATION_SEC - elapsed_time)
-        draw_timer(screen, time_left)
-        draw_score(screen, score)
-        draw_health(screen, health, INITIAL_HEALTH)
-        if active_policies:
-            y_offset = 0
-            for policy in active_policies:
-                draw_active_policy(screen, policy, POLICY_COLORS, ui_padding=10, ui_element_height=40, y_offset=y_offset)
-                y_offset += 45
+        hud.draw(screen, time_left, simulation.score, simulation.health, INITIAL_HEALTH, simulation.active_policies,
+                 POLICY_COLORS)
         toast_alpha = draw_toast(screen, toast_message, toast_end_time, toast_alpha, time.time())
 
-        if game_state in ["win", "game_over"]:
-            draw_game_over_screen(screen, game_state, score, sky_color_bottom)
+        if simulation.state in ["win", "game_over"]:
+            draw_game_over_screen(screen, simulation.state, simulation.score, sky_color_bottom)
+        profiler.lap("HUD")
+        profiler.draw_overlay(screen)
+        profiler.skip()
 
         pygame.display.flip()
+        profiler.lap("flip")
+        profiler.end_frame()
 
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Risk Rush Deluxe")
+    parser.add_argument("--record", metavar="PATH", help="записать раунд (seed и действия игрока) в файл")
+    parser.add_argument("--compress", action="store_true", help="сжимать запись zlib")
+    parser.add_argument("--replay", metavar="PATH", help="воспроизвести запись")
+    parser.add_argument("--headless", action="store_true", help="воспроизвести запись без окна и как можно быстрее")
+    parser.add_argument("--trace", metavar="PATH", help="писать время стадий кадра в Chrome trace JSON (Perfetto)")
+    parser.add_argument("--bake-assets", action="store_true", help="запечь процедурные поверхности в кэш на диске и выйти")
+    args = parser.parse_args()
+
+    if args.bake_assets:
+        pygame.init()
+        count, size = bake_assets()
+        print(f"Запечено поверхностей: {count} ({size / 1024 / 1024:.1f} МБ) в {ASSET_CACHE_DIR}")
+        sys.exit()
+
+    if args.replay and args.headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.init()
+        print(run_replay(Replay.load(args.replay)))
+        sys.exit()
+
     print("Запуск Risk Rush Deluxe - Финальная версия (без Asset-ов)...")
-    game() 
\ No newline at end of file
+    game(args.record, Replay.load(args.replay) if args.replay else None, args.compress, args.trace) 
\ No newline at end of file
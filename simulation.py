@@ -0,0 +1,321 @@
+import random
+import pygame
+from collections import Counter
+from config import (INITIAL_SPEED, SPEED_INCREMENT, SPEED_INCREMENT_INTERVAL_SEC, OBSTACLE_SPAWN_DELAY,
+                    BOOSTER_SPAWN_DELAY_FACTOR, MIN_OBSTACLE_SPAWN_DELAY, MIN_BOOSTER_SPAWN_DELAY,
+                    GAME_DURATION_SEC, INITIAL_HEALTH, RISK_COSTS, RISK_PROTECTION, RISK_TYPES, POLICY_TYPES,
+                    LANE_YS, SIM_HZ, OBSTACLE_POOL_SIZE, BOOSTER_POOL_SIZE, SCREEN_WIDTH)
+from sprites.player import Player
+from sprites.obstacles import Obstacle, Booster
+from sprites.background import WeatherSystem, GroundLayer
+from utils.rng import seed_streams, get_rng
+from utils.collisions import LaneGroup, get_player_lanes, collide_lanes
+from utils.pool import SpritePool
+from utils.replay import params_checksum
+
+# Параметры баланса, которые можно переопределять в симуляции (имена как в config.py)
+DEFAULT_PARAMS = {
+    "INITIAL_SPEED": INITIAL_SPEED,
+    "SPEED_INCREMENT": SPEED_INCREMENT,
+    "SPEED_INCREMENT_INTERVAL_SEC": SPEED_INCREMENT_INTERVAL_SEC,
+    "OBSTACLE_SPAWN_DELAY": OBSTACLE_SPAWN_DELAY,
+    "BOOSTER_SPAWN_DELAY_FACTOR": BOOSTER_SPAWN_DELAY_FACTOR,
+    "MIN_OBSTACLE_SPAWN_DELAY": MIN_OBSTACLE_SPAWN_DELAY,
+    "MIN_BOOSTER_SPAWN_DELAY": MIN_BOOSTER_SPAWN_DELAY,
+    "GAME_DURATION_SEC": GAME_DURATION_SEC,
+    "INITIAL_HEALTH": INITIAL_HEALTH,
+    "RISK_COSTS": dict(RISK_COSTS),
+}
+
+def make_params(overrides=None):
+    # Переопределения вида {"INITIAL_SPEED": 300, "RISK_COSTS.tree": 20000}
+    params = dict(DEFAULT_PARAMS, RISK_COSTS=dict(DEFAULT_PARAMS["RISK_COSTS"]))
+    for name, value in (overrides or {}).items():
+        if name.startswith("RISK_COSTS."):
+            risk = name.split(".", 1)[1]
+            if risk not in RISK_TYPES:
+                raise KeyError(f"Неизвестный тип риска: {risk} (есть: {', '.join(RISK_TYPES)})")
+            params["RISK_COSTS"][risk] = value
+        elif name in params:
+            params[name] = value
+        else:
+            raise KeyError(f"Неизвестный параметр баланса: {name}")
+    return params
+
+class GameSimulation:
+    # Игровые правила без отрисовки: спавн, ускорение, столкновения, очки и здоровье.
+    # step() вызывается с фиксированным шагом (1 / SIM_HZ), все скорости - в единицах в секунду.
+    # step() возвращает события, по которым main.game() рисует частицы, тосты и тряску экрана:
+    # ("particles", batch), ("booster", policy, center), ("protected", risk, policy, center), ("damage", risk).
+    # События не ссылаются на спрайты: сбитые спрайты сразу возвращаются в пул и могут появиться снова
+    # на следующем шаге того же кадра.
+    # Случайность берётся из потоков utils.rng, поэтому seed_streams(seed) до создания делает раунд повторяемым
+    def __init__(self, params=None):
+        # Кадры бустеров рисуют текст шрифтом, а без окна pygame.init() никто не вызывал
+        # (run_round, run_replay, воркеры balance.py); повторный вызов ничего не делает
+        pygame.font.init()
+        self.rng = get_rng("spawn")
+        # Необязательный utils.profiler.FrameProfiler для замера стадий шага
+        self.profiler = None
+
+        self.player = Player()
+        self.all_sprites = pygame.sprite.Group(self.player)
+        # Препятствия и бустеры проиндексированы по полосам для проверки столкновений
+        self.obstacles_group = LaneGroup()
+        self.boosters_group = LaneGroup()
+        # Препятствия и бустеры переиспользуются, а не создаются заново на каждый спавн
+        self.obstacle_pool = SpritePool(Obstacle, OBSTACLE_POOL_SIZE)
+        self.booster_pool = SpritePool(Booster, BOOSTER_POOL_SIZE)
+
+        self.reset(params if params is not None else make_params(), reset_player=False)
+
+    def reset(self, params=None, reset_player=True):
+        # Новый раунд на тех же объектах: спрайты возвращаются в пулы, игрок - на старт.
+        # После seed_streams(seed) раунд повторяет раунд свежесозданной симуляции с тем же seed
+        if params is not None:
+            self.params = params
+        for sprite in self.obstacles_group.sprites() + self.boosters_group.sprites():
+            sprite.kill()
+        if reset_player:
+            self.player.reset()
+
+        self.world_speed = self.params["INITIAL_SPEED"]
+        self.score = 0
+        self.health = self.params["INITIAL_HEALTH"]
+        self.active_policies = []
+        self.elapsed = 0.0
+        self.steps = 0
+        # Пройденный путь (для разметки дороги) сейчас и на предыдущем шаге
+        self.distance = 0.0
+        self.prev_distance = 0.0
+        self.last_speed_up_time = 0.0
+        self.state = "playing"
+
+        # Таймеры спавна
+        self.base_obstacle_spawn_delay = self.params["OBSTACLE_SPAWN_DELAY"]
+        self.obstacle_spawn_delay = self.base_obstacle_spawn_delay
+        self.obstacle_spawn_timer = self.obstacle_spawn_delay * 0.8
+
+        self.base_booster_spawn_delay = self.base_obstacle_spawn_delay * self.params["BOOSTER_SPAWN_DELAY_FACTOR"]
+        self.booster_spawn_delay = self.base_booster_spawn_delay
+        self.booster_spawn_timer = self.booster_spawn_delay * 0.5
+
+        # Статистика для балансировки
+        self.collisions = Counter()
+        self.protected = Counter()
+        self.boosters_collected = Counter()
+
+    def get_road_scroll(self, alpha=1.0):
+        return self.prev_distance + (self.distance - self.prev_distance) * alpha
+
+    def get_time_left(self):
+        return max(0, self.params["GAME_DURATION_SEC"] - self.elapsed)
+
+    def handle_action(self, action):
+        # action: "up", "down" или "jump"; возвращает события так же, как step()
+        if self.state != "playing":
+            return []
+        if action == "up":
+            self.player.change_lane(-1)
+        elif action == "down":
+            self.player.change_lane(1)
+        elif action == "jump":
+            particles = self.player.jump()
+            if particles:
+                return [("particles", particles)]
+        return []
+
+    def step(self, dt):
+        events = []
+        if self.state != "playing":
+            return events
+        self.steps += 1
+        self.elapsed = self.steps * dt
+        self.prev_distance = self.distance
+        self.distance += self.world_speed * dt
+
+        # Обновление скорости игры
+        if self.elapsed - self.last_speed_up_time > self.params["SPEED_INCREMENT_INTERVAL_SEC"]:
+            self.world_speed += self.params["SPEED_INCREMENT"]
+            self.last_speed_up_time = self.elapsed
+            self.obstacle_spawn_delay = max(self.params["MIN_OBSTACLE_SPAWN_DELAY"],
+                                            (self.params["INITIAL_SPEED"] / self.world_speed)
+                                            * self.base_obstacle_spawn_delay)
+            self.booster_spawn_delay = max(self.params["MIN_BOOSTER_SPAWN_DELAY"], self.obstacle_spawn_delay * 2.0)
+
+        # Спавн препятствий
+        self.obstacle_spawn_timer += dt
+        if self.obstacle_spawn_timer >= self.obstacle_spawn_delay:
+            obs = self.obstacle_pool.acquire(self.world_speed, self.rng.choice(RISK_TYPES))
+            self.all_sprites.add(obs)
+            self.obstacles_group.add(obs)
+            self.obstacle_spawn_timer = self.rng.uniform(-0.1, 0.1)
+
+        # Спавн бустеров
+        self.booster_spawn_timer += dt
+        if self.booster_spawn_timer >= self.booster_spawn_delay:
+            boost = self.booster_pool.acquire(self.world_speed, self.rng.choice(POLICY_TYPES))
+            self.all_sprites.add(boost)
+            self.boosters_group.add(boost)
+            self.booster_spawn_timer = self.rng.uniform(-0.2, 0.2)
+
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.lap("spawn")
+
+        # Обновление игрока и создание частиц
+        particles = self.player.update(dt)
+        if particles:
+            events.append(("particles", particles))
+
+        # Обновление остальных спрайтов
+        for sprite in self.all_sprites:
+            if sprite != self.player:
+                sprite.update(self.world_speed, dt)
+        if profiler is not None:
+            profiler.lap("sprite update")
+
+        # Проверка коллизий с бустерами: в прыжке их можно подобрать и над соседними полосами
+        player = self.player
+        for booster in collide_lanes(player, self.boosters_group, get_player_lanes(player), True):
+            if booster.policy_type not in self.active_policies:
+                self.active_policies.append(booster.policy_type)
+                self.boosters_collected[booster.policy_type] += 1
+                events.append(("booster", booster.policy_type, booster.rect.center))
+
+        # Проверка коллизий с препятствиями: в прыжке (can_collide == False) игрок над ними
+        obstacle_lanes = (player.current_lane_index,) if player.can_collide else ()
+        for obstacle in collide_lanes(player, self.obstacles_group, obstacle_lanes, True):
+            risk = obstacle.risk_type
+            protection = RISK_PROTECTION.get(risk)
+
+            if protection in self.active_policies:
+                self.score += self.params["RISK_COSTS"].get(risk, 0)
+                self.active_policies.remove(protection)
+                self.protected[risk] += 1
+                events.append(("protected", risk, protection, obstacle.rect.center))
+            else:
+                self.health -= 1
+                self.collisions[risk] += 1
+                events.append(("damage", risk))
+
+            if self.health <= 0:
+                self.state = "game_over"
+                break
+
+        if self.elapsed >= self.params["GAME_DURATION_SEC"] and self.state == "playing":
+            self.state = "win"
+        if profiler is not None:
+            profiler.lap("collisions")
+        return events
+
+    def get_pool_stats(self):
+        return {"obstacles": self.obstacle_pool.get_stats(), "boosters": self.booster_pool.get_stats()}
+
+    def get_outcome(self):
+        outcome = {
+            "result": self.state,
+            "score": self.score,
+            "health": self.health,
+            "time_survived": round(self.elapsed, 3),
+            "final_speed": round(self.world_speed, 3),
+            "boosters_collected": sum(self.boosters_collected.values()),
+        }
+        for risk in RISK_TYPES:
+            outcome[f"collisions_{risk}"] = self.collisions[risk]
+            outcome[f"protected_{risk}"] = self.protected[risk]
+        return outcome
+
+class RandomPolicy:
+    # Случайные нажатия: в среднем actions_per_sec действий в секунду
+    def __init__(self, seed=None, actions_per_sec=1.5):
+        self.rng = random.Random(seed)
+        self.actions_per_sec = actions_per_sec
+
+    def act(self, simulation, dt):
+        if self.rng.random() < self.actions_per_sec * dt:
+            return [self.rng.choice(["up", "down", "jump"])]
+        return []
+
+class ScriptedPolicy:
+    # Простой бот: уходит с полосы от незащищённого риска, прыгает, если уйти некуда,
+    # и перестраивается к бустерам, если соседняя полоса свободна
+    def __init__(self, seed=None, lookahead=220, jump_distance=60):
+        self.lookahead = lookahead
+        self.jump_distance = jump_distance
+
+    def get_threats(self, simulation):
+        player = simulation.player
+        threats = {}
+        for obstacle in simulation.obstacles_group:
+            distance = obstacle.rect.left - player.rect.right
+            if RISK_PROTECTION.get(obstacle.risk_type) in simulation.active_policies:
+                continue
+            if -obstacle.rect.width - player.rect.width <= distance <= self.lookahead:
+                lane = obstacle.lane_index
+                threats[lane] = min(threats.get(lane, distance), distance)
+        return threats
+
+    def act(self, simulation, dt):
+        player = simulation.player
+        if player.is_jumping:
+            return []
+        lane = player.current_lane_index
+        threats = self.get_threats(simulation)
+
+        if lane in threats:
+            for direction in (-1, 1):
+                if 0 <= lane + direction < len(LANE_YS) and lane + direction not in threats:
+                    return ["up" if direction < 0 else "down"]
+            if threats[lane] <= self.jump_distance:
+                return ["jump"]
+            return []
+
+        for booster in simulation.boosters_group:
+            if booster.policy_type in simulation.active_policies or booster.rect.left < player.rect.right:
+                continue
+            target = booster.lane_index
+            if target != lane:
+                direction = 1 if target > lane else -1
+                if lane + direction not in threats:
+                    return ["up" if direction < 0 else "down"]
+        return []
+
+POLICIES = {"random": RandomPolicy, "scripted": ScriptedPolicy}
+
+def run_round(params=None, seed=0, policy="scripted", dt=1.0 / SIM_HZ):
+    # Один раунд без отрисовки; раунд с тем же seed повторяется
+    seed_streams(seed)
+    simulation = GameSimulation(params)
+    agent = POLICIES[policy](seed)
+    while simulation.state == "playing":
+        for action in agent.act(simulation, dt):
+            simulation.handle_action(action)
+        simulation.step(dt)
+    outcome = simulation.get_outcome()
+    outcome["steps"] = simulation.steps
+    return outcome
+
+def run_replay(replay, params=None):
+    # Ускоренное воспроизведение записи без отрисовки; возвращает итог раунда
+    params = params if params is not None else make_params()
+    if params_checksum(params) != replay.params_crc:
+        raise ValueError("Запись сделана с другими параметрами баланса")
+    dt = 1.0 / replay.sim_hz
+    seed_streams(replay.seed)
+    simulation = GameSimulation(params)
+    # Погода и земля шагают вместе с симуляцией, как в main.py
+    weather_system = WeatherSystem()
+    ground_layer = GroundLayer()
+    replay.rewind()
+    while simulation.state == "playing" and (replay.end_step is None or simulation.steps < replay.end_step):
+        for action in replay.pop_actions(simulation.steps):
+            simulation.handle_action(action)
+        simulation.step(dt)
+        weather_system.update(dt)
+        ground_layer.update(SCREEN_WIDTH, weather_system, dt)
+    outcome = simulation.get_outcome()
+    outcome["steps"] = simulation.steps
+    outcome["weather"] = weather_system.current_weather
+    outcome["snow_level"] = weather_system.snow_level
+    return outcome
@@ -1,125 +1,302 @@
 import pygame
 import random
 import math
-from config import (SCREEN_WIDTH, SCREEN_HEIGHT, WINDOW_COLOR, DARK_GREY, GROUND_COLOR_TOP,
-                   GROUND_COLOR_BOTTOM, WEATHER_TYPES, LANE_YS, PLAYER_SIZE)
+import numpy as np
+from itertools import chain
+from functools import partial
+from config import (SCREEN_WIDTH, SCREEN_HEIGHT, WINDOW_COLOR, GROUND_COLOR_TOP,
+                   GROUND_COLOR_BOTTOM, WEATHER_TYPES, LANE_YS, PLAYER_SIZE, GROUND_CROSSFADE_SEC,
+                   WEATHER_MAX_RAIN_DROPS, WEATHER_MAX_SNOW_FLAKES, SNOW_ANGLE_STEPS, SNOW_SIZE_BUCKETS,
+                   WEATHER_RAIN_SHEET, RAIN_SHEET_LAYERS, BLACK, PARALLAX_STRIP_MARGIN,
+                   ROAD_COLOR, ROAD_LINE_COLOR, ROAD_MARKING_SCROLL_FACTOR, FPS)
+from utils.rng import get_rng, get_np_rng
+from utils.assets import get_baked
+
+class PrecipitationArrays:
+    # Капли или снежинки в массивах фиксированной ёмкости; живые занимают первые count ячеек
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.count = 0
+        self.fields = fields
+        for name in fields:
+            setattr(self, name, np.zeros(capacity, dtype=np.float32))
+
+    def __len__(self):
+        return self.count
+
+    def view(self, name):
+        return getattr(self, name)[:self.count]
+
+    def spawn(self, n, **values):
+        n = min(n, self.capacity - self.count)
+        if n <= 0:
+            return
+        start, end = self.count, self.count + n
+        for name in self.fields:
+            # Лишние значения сверх свободного места отбрасываются, скаляры растягиваются на n
+            value = np.asarray(values[name])
+            getattr(self, name)[start:end] = value[:n] if value.ndim else value
+        self.count = end
+
+    def shrink(self, n):
+        self.count = max(0, self.count - n)
+
+    def clear(self):
+        self.count = 0
+
+    def keep(self, mask):
+        kept = int(np.count_nonzero(mask))
+        if kept == self.count:
+            return
+        for name in self.fields:
+            values = getattr(self, name)
+            values[:kept] = values[:self.count][mask]
+        self.count = kept
+
+class PrecipitationRenderer:
+    # Снежинки заранее повернуты на квантованные углы и разложены по размерам, капли -
+    # по длинам; все осадки выводятся одним вызовом Surface.blits.
+    # В режиме rain_sheet дождь рисуется несколькими прокручиваемыми слоями-текстурами
+    RAIN_COLOR = (200, 200, 255)
+    SNOW_COLOR = (255, 255, 255)
+
+    def __init__(self, angle_steps=SNOW_ANGLE_STEPS, size_buckets=SNOW_SIZE_BUCKETS, rain_sheet=WEATHER_RAIN_SHEET,
+                 sheet_layers=RAIN_SHEET_LAYERS):
+        self.angle_steps = angle_steps
+        self.size_buckets = size_buckets
+        self.rain_sheet = rain_sheet
+        self.sheet_layers = sheet_layers
+        self._flake_sprites = None
+        self._drop_sprites = None
+        self._sheets = None
+        self._sheet_offsets = [0.0] * sheet_layers
+
+    def _prepare_sprite(self, sprite, colorkey):
+        sprite.set_colorkey(colorkey, pygame.RLEACCEL)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert()
+        return sprite
+
+    def _build_flake_sprites(self):
+        # Индекс спрайта: bucket * angle_steps + angle_index; размеры 2..4 делятся на size_buckets корзин
+        sprites = []
+        for bucket in range(self.size_buckets):
+            size = 2 + 2 * (bucket + 0.5) / self.size_buckets
+            half = int(math.ceil(size)) + 1
+            for angle_index in range(self.angle_steps):
+                angle = 360 * angle_index / self.angle_steps
+                sprite = pygame.Surface((half * 2 + 1, half * 2 + 1))
+                sprite.fill(BLACK)
+                for i in range(4):
+                    rad_angle = math.radians(angle + i * 45)
+                    end = (half + math.cos(rad_angle) * size, half + math.sin(rad_angle) * size)
+                    pygame.draw.line(sprite, self.SNOW_COLOR, (half, half), end, 1)
+                sprites.append(self._prepare_sprite(sprite, BLACK))
+        return sprites
+
+    def _build_drop_sprites(self):
+        # Капля - линия от (x, y) до (x - 2, y + length) толщиной 2; индекс - длина
+        sprites = {}
+        for length in range(10, 21):
+            sprite = pygame.Surface((6, length + 3))
+            sprite.fill(BLACK)
+            pygame.draw.line(sprite, self.RAIN_COLOR, (3, 0), (1, length), 2)
+            sprites[length] = self._prepare_sprite(sprite, BLACK)
+        return sprites
+
+    def _build_sheets(self, capacity):
+        rng = random.Random(7)
+        sheets = []
+        drops_per_layer = max(1, capacity // self.sheet_layers)
+        for layer in range(self.sheet_layers):
+            sheet = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            sheet.fill(BLACK)
+            for _ in range(drops_per_layer):
+                x = rng.randint(0, SCREEN_WIDTH)
+                y = rng.randint(0, SCREEN_HEIGHT)
+                length = rng.randint(10, 20)
+                pygame.draw.line(sheet, self.RAIN_COLOR, (x, y), (x - 2, y + length), 2)
+            speed = 450 + 200 * (layer + 0.5) / self.sheet_layers
+            sheets.append((self._prepare_sprite(sheet, BLACK), speed))
+        return sheets
+
+    def update(self, dt):
+        if self._sheets:
+            for i, (_, speed) in enumerate(self._sheets):
+                self._sheet_offsets[i] = (self._sheet_offsets[i] + speed * dt) % SCREEN_HEIGHT
+
+    def _draw_rain_sheets(self, surface, rain, offset_x, offset_y):
+        if self._sheets is None:
+            self._sheets = self._build_sheets(rain.capacity)
+        # Плотность дождя - число видимых слоев; последний слой частично прозрачный
+        layers_visible = len(self._sheets) * len(rain) / rain.capacity
+        blits = []
+        for i, (sheet, _) in enumerate(self._sheets):
+            coverage = min(1.0, layers_visible - i)
+            if coverage <= 0:
+                break
+            sheet.set_alpha(int(255 * coverage) if coverage < 1.0 else None)
+            y = int(self._sheet_offsets[i]) + offset_y
+            blits.append((sheet, (offset_x, y)))
+            blits.append((sheet, (offset_x, y - SCREEN_HEIGHT)))
+        surface.blits(blits, doreturn=False)
+
+    def draw(self, surface, rain, snow, offset_x=0, offset_y=0):
+        if self._flake_sprites is None:
+            self._flake_sprites = self._build_flake_sprites()
+            self._drop_sprites = self._build_drop_sprites()
+
+        blit_groups = []
+        if len(rain):
+            if self.rain_sheet:
+                self._draw_rain_sheets(surface, rain, offset_x, offset_y)
+            else:
+                drop_sprites = [self._drop_sprites[length] for length in rain.view("length").astype(np.int32).tolist()]
+                xs = (rain.view("x") + (offset_x - 3)).astype(np.int32).tolist()
+                ys = (rain.view("y") + offset_y).astype(np.int32).tolist()
+                blit_groups.append(zip(drop_sprites, zip(xs, ys)))
+
+        if len(snow):
+            half = np.array([int(math.ceil(2 + 2 * (b + 0.5) / self.size_buckets)) + 1
+                             for b in range(self.size_buckets)], dtype=np.int32)
+            buckets = np.clip(((snow.view("size") - 2) / 2 * self.size_buckets).astype(np.int32), 0,
+                              self.size_buckets - 1)
+            angle_index = np.rint(snow.view("angle") % 360 / 360 * self.angle_steps).astype(np.int32) % self.angle_steps
+            sprite_index = (buckets * self.angle_steps + angle_index).tolist()
+            xs = ((snow.view("x") + offset_x).astype(np.int32) - half[buckets]).tolist()
+            ys = ((snow.view("y") + offset_y).astype(np.int32) - half[buckets]).tolist()
+            flake_sprites = self._flake_sprites
+            blit_groups.append(zip([flake_sprites[i] for i in sprite_index], zip(xs, ys)))
+
+        if blit_groups:
+            surface.blits(chain(*blit_groups), doreturn=False)
+
+def render_snow_ground(ground_height, screen_width, snow_level):
+    # Генерируем поверхность снега (свой генератор - глобальный random не трогаем)
+    rng = random.Random(snow_level)
+    snow_surface = pygame.Surface((screen_width, ground_height), pygame.SRCALPHA)
+    if snow_level > 0:
+        alpha = 120 if snow_level == 1 else 230
+        snow_surface.fill((255, 255, 255, alpha))
+        snow_detail = pygame.Surface((screen_width, ground_height), pygame.SRCALPHA)
+        n_snow = 40 if snow_level == 1 else 100
+        for _ in range(n_snow):
+            x = rng.randint(0, screen_width)
+            y = rng.randint(0, ground_height)
+            size = rng.randint(15, 30) if snow_level == 1 else rng.randint(30, 60)
+            a = rng.randint(60, 120) if snow_level == 1 else rng.randint(150, 255)
+            pygame.draw.circle(snow_detail, (255, 255, 255, a), (x, y), size)
+        n_spark = 60 if snow_level == 1 else 300
+        for _ in range(n_spark):
+            x = rng.randint(0, screen_width)
+            y = rng.randint(0, ground_height)
+            size = rng.randint(1, 2) if snow_level == 1 else rng.randint(1, 3)
+            a = rng.randint(80, 120) if snow_level == 1 else rng.randint(200, 255)
+            pygame.draw.circle(snow_detail, (255, 255, 255, a), (x, y), size)
+        snow_surface.blit(snow_detail, (0, 0))
+    return snow_surface
 
 class WeatherSystem:
     def __init__(self):
+        self.cycle_rng = get_rng("weather")
+        self.max_rain_drops = WEATHER_MAX_RAIN_DROPS
+        self.max_snow_flakes = WEATHER_MAX_SNOW_FLAKES
+        self.rain_drops = PrecipitationArrays(self.max_rain_drops, ("x", "y", "speed", "length"))
+        self.snow_flakes = PrecipitationArrays(self.max_snow_flakes,
+                                               ("x", "y", "speed_y", "speed_x", "size", "angle", "spin"))
+        # Скорость набора и затухания осадков масштабируется вместе с ёмкостью (частиц за кадр при FPS)
+        self.rain_ramp = max(2, self.max_rain_drops // 175)
+        self.rain_fade = max(10, self.max_rain_drops // 35)
+        self.snow_ramp = max(2, self.max_snow_flakes // 200)
+        self.snow_fade = max(12, self.max_snow_flakes // 33)
+        self.rng = get_np_rng("precipitation")
+        self.renderer = PrecipitationRenderer()
+        self.reset()
+
+    def reset(self):
+        # Начальная погода раунда; массивы осадков и рендерер сохраняются
         self.current_weather = "clear"
         self.next_weather = None
         self.transition_progress = 1.0  # 1.0 means no transition
         self.weather_timer = 0
-        self.weather_duration = random.randint(*WEATHER_TYPES["clear"]["duration"])
-        self.rain_drops = []
-        self.snow_flakes = []  # Список для хранения снежинок
-        self.max_rain_drops = 350
-        self.max_snow_flakes = 400  # Сделал больше для гуще
+        self.weather_duration = self.cycle_rng.randint(*WEATHER_TYPES["clear"]["duration"])
+        self.rain_drops.clear()
+        self.snow_flakes.clear()
+        # Дробная часть кадров набора/затухания осадков: update() можно вызывать с любым шагом
+        self.ramp_frames = 0.0
         # --- Для ступенчатого снега ---
         self.snow_level = 0  # 0 - нет, 1 - немного, 2 - максимум
         self.snow_stage_timer = 0
         self.snow_stage_target = 0
-        # --- Кэш для статичного снега на земле ---
-        self._snow_ground_cache = {}
-        self._snow_ground_cache_params = {}
         
-    def get_static_snow_ground(self, ground_height, screen_width):
-        key = (self.snow_level, ground_height, screen_width)
-        if key in self._snow_ground_cache:
-            return self._snow_ground_cache[key]
-        # Генерируем поверхность снега
-        snow_surface = pygame.Surface((screen_width, ground_height), pygame.SRCALPHA)
-        snow_level = self.snow_level
-        if snow_level > 0:
-            alpha = 120 if snow_level == 1 else 230
-            snow_surface.fill((255, 255, 255, alpha))
-            snow_detail = pygame.Surface((screen_width, ground_height), pygame.SRCALPHA)
-            n_snow = 40 if snow_level == 1 else 100
-            for _ in range(n_snow):
-                x = random.randint(0, screen_width)
-                y = random.randint(0, ground_height)
-                size = random.randint(15, 30) if snow_level == 1 else random.randint(30, 60)
-                a = random.randint(60, 120) if snow_level == 1 else random.randint(150, 255)
-                pygame.draw.circle(snow_detail, (255, 255, 255, a), (x, y), size)
-            n_spark = 60 if snow_level == 1 else 300
-            for _ in range(n_spark):
-                x = random.randint(0, screen_width)
-                y = random.randint(0, ground_height)
-                size = random.randint(1, 2) if snow_level == 1 else random.randint(1, 3)
-                a = random.randint(80, 120) if snow_level == 1 else random.randint(200, 255)
-                pygame.draw.circle(snow_detail, (255, 255, 255, a), (x, y), size)
-            snow_surface.blit(snow_detail, (0, 0))
-        self._snow_ground_cache[key] = snow_surface
-        return snow_surface
-
-    def clear_snow_ground_cache(self):
-        self._snow_ground_cache = {}
-
     def update(self, dt):
+        # Вызывается с фиксированным шагом симуляции, поэтому смена погоды и снег повторяются в записи
         self.weather_timer += dt
+        self.renderer.update(dt)
+        self.ramp_frames += dt * FPS
+        ramp_frames = int(self.ramp_frames)
+        self.ramp_frames -= ramp_frames
         
+        rain_chance = WEATHER_TYPES[self.current_weather]["rain_chance"]
+        snow_chance = WEATHER_TYPES[self.current_weather]["snow_chance"]
+        rng = self.rng
+        rain = self.rain_drops
+        snow = self.snow_flakes
+
         # --- Новый стабильный дождь ---
-        if WEATHER_TYPES[self.current_weather]["rain_chance"] > 0:
-            need = int(self.max_rain_drops * WEATHER_TYPES[self.current_weather]["rain_chance"]) - len(self.rain_drops)
+        if rain_chance > 0:
+            need = int(self.max_rain_drops * rain_chance) - len(rain)
             if need > 0:
-                for _ in range(min(2, need)):
-                    self.rain_drops.append({
-                        'x': random.randint(0, SCREEN_WIDTH),
-                        'y': random.randint(-50, 0),
-                        'speed': random.uniform(450, 650),
-                        'length': random.randint(10, 20)
-                    })
+                n = min(self.rain_ramp * ramp_frames, need)
+                rain.spawn(n, x=rng.integers(0, SCREEN_WIDTH + 1, n), y=rng.integers(-50, 1, n),
+                           speed=rng.uniform(450, 650, n), length=rng.integers(10, 21, n))
             # Не очищаем rain_drops полностью при смене погоды
         else:
-            # Плавно уменьшаем количество капель, удаляя по 10 за кадр
-            self.rain_drops = self.rain_drops[10:] if len(self.rain_drops) > 10 else []
-        
+            # Плавно уменьшаем количество капель
+            rain.shrink(self.rain_fade * ramp_frames)
+
         # --- Новый стабильный снег ---
-        if WEATHER_TYPES[self.current_weather]["snow_chance"] > 0:
-            need = int(self.max_snow_flakes * WEATHER_TYPES[self.current_weather]["snow_chance"]) - len(self.snow_flakes)
+        if snow_chance > 0:
+            need = int(self.max_snow_flakes * snow_chance) - len(snow)
             if need > 0:
-                for _ in range(min(2, need)):
-                    self.snow_flakes.append({
-                        'x': random.randint(0, SCREEN_WIDTH),
-                        'y': random.randint(-50, 0),
-                        'speed_y': random.uniform(80, 130),
-                        'speed_x': random.uniform(-20, 20),
-                        'size': random.uniform(2, 4),
-                        'angle': random.uniform(0, 360),
-                        'spin': random.uniform(-90, 90)
-                    })
+                n = min(self.snow_ramp * ramp_frames, need)
+                snow.spawn(n, x=rng.integers(0, SCREEN_WIDTH + 1, n), y=rng.integers(-50, 1, n),
+                           speed_y=rng.uniform(80, 130, n), speed_x=rng.uniform(-20, 20, n),
+                           size=rng.uniform(2, 4, n), angle=rng.uniform(0, 360, n), spin=rng.uniform(-90, 90, n))
         else:
-            # Плавно уменьшаем количество снежинок, удаляя по 12 за кадр
-            self.snow_flakes = self.snow_flakes[12:] if len(self.snow_flakes) > 12 else []
-        
-        # Обновляем существующие капли
-        active_drops = []
-        for drop in self.rain_drops:
-            drop['y'] += drop['speed'] * dt
-            if drop['y'] < SCREEN_HEIGHT:
-                active_drops.append(drop)
-            else:
-                if random.random() < WEATHER_TYPES[self.current_weather]["rain_chance"]:
-                    drop['y'] = random.randint(-50, 0)
-                    drop['x'] = random.randint(0, SCREEN_WIDTH)
-                    active_drops.append(drop)
-        self.rain_drops = active_drops
+            # Плавно уменьшаем количество снежинок
+            snow.shrink(self.snow_fade * ramp_frames)
+
+        # Обновляем существующие капли: упавшие возвращаются наверх с вероятностью rain_chance
+        if len(rain):
+            y = rain.view("y")
+            y += rain.view("speed") * dt
+            fallen = y >= SCREEN_HEIGHT
+            if fallen.any():
+                recycled = fallen & (rng.random(len(rain)) < rain_chance)
+                n = int(np.count_nonzero(recycled))
+                if n:
+                    y[recycled] = rng.integers(-50, 1, n)
+                    rain.view("x")[recycled] = rng.integers(0, SCREEN_WIDTH + 1, n)
+                rain.keep(~fallen | recycled)
 
         # Обновляем существующие снежинки
-        active_flakes = []
-        for flake in self.snow_flakes:
-            flake['y'] += flake['speed_y'] * dt
-            flake['x'] += flake['speed_x'] * dt
-            flake['angle'] += flake['spin'] * dt
-            if flake['y'] < SCREEN_HEIGHT and 0 <= flake['x'] <= SCREEN_WIDTH:
-                active_flakes.append(flake)
-            else:
-                if random.random() < WEATHER_TYPES[self.current_weather]["snow_chance"]:
-                    flake['y'] = random.randint(-50, 0)
-                    flake['x'] = random.randint(0, SCREEN_WIDTH)
-                    active_flakes.append(flake)
-        self.snow_flakes = active_flakes
-        
+        if len(snow):
+            x = snow.view("x")
+            y = snow.view("y")
+            y += snow.view("speed_y") * dt
+            x += snow.view("speed_x") * dt
+            angle = snow.view("angle")
+            angle += snow.view("spin") * dt
+            gone = (y >= SCREEN_HEIGHT) | (x < 0) | (x > SCREEN_WIDTH)
+            if gone.any():
+                recycled = gone & (rng.random(len(snow)) < snow_chance)
+                n = int(np.count_nonzero(recycled))
+                if n:
+                    y[recycled] = rng.integers(-50, 1, n)
+                    x[recycled] = rng.integers(0, SCREEN_WIDTH + 1, n)
+                snow.keep(~gone | recycled)
+
         # Смена погоды
         if self.weather_timer >= self.weather_duration:
             if self.next_weather is None:
@@ -142,7 +319,7 @@ class WeatherSystem:
                     self.current_weather = self.next_weather
                     self.next_weather = None
                     self.weather_timer = 0
-                    self.weather_duration = random.randint(*WEATHER_TYPES[self.current_weather]["duration"])
+                    self.weather_duration = self.cycle_rng.randint(*WEATHER_TYPES[self.current_weather]["duration"])
         
         # --- Логика ступенчатого снега ---
         # При переходе к snowy начинаем накапливать снег
@@ -155,7 +332,6 @@ class WeatherSystem:
                 if self.snow_stage_timer > 2.0:
                     self.snow_level += 1
                     self.snow_stage_timer = 0
-                    self.clear_snow_ground_cache()
         # При переходе к sunrise начинаем таять снег
         elif self.current_weather == "sunrise":
             if self.snow_stage_target != 0:
@@ -166,12 +342,9 @@ class WeatherSystem:
                 if self.snow_stage_timer > 2.0:
                     self.snow_level -= 1
                     self.snow_stage_timer = 0
-                    self.clear_snow_ground_cache()
         # Если не снег и не рассвет — сбрасываем снег
         elif self.current_weather not in ["snowy", "sunrise"]:
-            if self.snow_level != 0:
-                self.snow_level = 0
-                self.clear_snow_ground_cache()
+            self.snow_level = 0
             self.snow_stage_target = 0
             self.snow_stage_timer = 0
     
@@ -189,51 +362,65 @@ class WeatherSystem:
         return sky_top, sky_bottom
     
     def draw_weather(self, surface, offset_x=0, offset_y=0):
-        # Отрисовка дождя
-        for drop in self.rain_drops:
-            end_y = drop['y'] + drop['length']
-            pygame.draw.line(surface, (200, 200, 255),
-                           (drop['x'] + offset_x, drop['y'] + offset_y),
-                           (drop['x'] + offset_x - 2, end_y + offset_y), 2)
-        
-        # Отрисовка снега
-        for flake in self.snow_flakes:
-            x = flake['x'] + offset_x
-            y = flake['y'] + offset_y
-            size = flake['size']
-            angle = flake['angle']
-            
-            # Рисуем снежинку как звездочку
-            for i in range(4):
-                rot_angle = angle + i * 45
-                rad_angle = math.radians(rot_angle)
-                end_x = x + math.cos(rad_angle) * size
-                end_y = y + math.sin(rad_angle) * size
-                pygame.draw.line(surface, (255, 255, 255),
-                               (x, y), (end_x, end_y), 1)
+        self.renderer.draw(surface, self.rain_drops, self.snow_flakes, offset_x, offset_y)
 
 class BackgroundElement:
     def __init__(self, y, height, min_width, max_width, color_palette, speed_factor, z_order):
+        self.rng = get_rng("background")
         self.base_y = y
         self.height_variation = height * 0.3
-        self.current_height = height + random.uniform(-self.height_variation, self.height_variation)
+        self.current_height = height + self.rng.uniform(-self.height_variation, self.height_variation)
         self.current_height = max(30.0, min(self.current_height, self.base_y * 0.8))
         ground_height = int(LANE_YS[0] * 0.3)
         max_building_height = self.base_y - ground_height
         self.current_height = min(self.current_height, max_building_height)
-        self.rect = pygame.Rect(random.randint(0, SCREEN_WIDTH),
+        self.rect = pygame.Rect(self.rng.randint(0, SCREEN_WIDTH),
                                 self.base_y - int(self.current_height),
-                                random.randint(min_width, max_width),
+                                self.rng.randint(min_width, max_width),
                                 int(self.current_height))
-        self.color = random.choice(color_palette)
+        self.color = self.rng.choice(color_palette)
         self.speed_factor = speed_factor
         self.z_order = z_order
-        self.has_windows = random.random() < 0.7
-        self.snow_height = random.randint(5, 10)
-        # --- Кэш для статичных снежных шапок ---
+        self.has_windows = self.rng.random() < 0.7
+        self.snow_height = self.rng.randint(5, 10)
+        # --- Кэш для статичных снежных шапок (создаются лениво, только когда выпал снег) ---
         self._snow_caps = {}
-        for snow_level in [1, 2]:
+        self.image = self._render_building()
+
+    def _render_building(self):
+        # Здание с фиксированным рисунком горящих окон рисуется один раз
+        surf = pygame.Surface(self.rect.size)
+        surf.fill(self.color)
+        local_rect = surf.get_rect()
+        darker_color = tuple(max(0, c - 20) for c in self.color)
+        pygame.draw.line(surf, darker_color, local_rect.topleft, local_rect.bottomleft, 3)
+        pygame.draw.line(surf, darker_color, local_rect.topleft, local_rect.topright, 3)
+
+        if self.has_windows and self.rect.width > 20 and self.rect.height > 20:
+            win_size_w = max(5, int(self.rect.width * 0.15))
+            win_size_h = max(5, int(self.rect.height * 0.1))
+            gap_w = max(3, int(win_size_w * 0.5))
+            gap_h = max(3, int(win_size_h * 0.5))
+
+            num_x = int((self.rect.width - gap_w) / (win_size_w + gap_w))
+            num_y = int((self.rect.height - gap_h) / (win_size_h + gap_h))
+
+            if num_x > 0 and num_y > 0:
+                for r_idx in range(num_y):
+                    for c_idx in range(num_x):
+                        win_x = gap_w + c_idx * (win_size_w + gap_w)
+                        win_y = gap_h + r_idx * (win_size_h + gap_h)
+                        if self.rng.random() < 0.6:
+                            pygame.draw.rect(surf, WINDOW_COLOR, (win_x, win_y, win_size_w, win_size_h))
+
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert()
+        return surf
+
+    def get_snow_cap(self, snow_level):
+        if snow_level not in self._snow_caps:
             self._snow_caps[snow_level] = self._generate_snow_cap(snow_level)
+        return self._snow_caps[snow_level]
 
     def _generate_snow_cap(self, snow_level):
         width = self.rect.width
@@ -242,9 +429,9 @@ class BackgroundElement:
         # Генерируем форму шапки один раз
         points = [
             (0, self.snow_height),
-            (random.randint(2, 5), int(self.snow_height * 0.5)),
-            (width // 2 + random.randint(-3, 3), int(self.snow_height * 0.2)),
-            (width - random.randint(2, 5), int(self.snow_height * 0.5)),
+            (self.rng.randint(2, 5), int(self.snow_height * 0.5)),
+            (width // 2 + self.rng.randint(-3, 3), int(self.snow_height * 0.2)),
+            (width - self.rng.randint(2, 5), int(self.snow_height * 0.5)),
             (width, self.snow_height)
         ]
         if snow_level == 1:
@@ -258,76 +445,128 @@ class BackgroundElement:
             pygame.draw.line(surf, (200, 200, 210), points[0], points[-1], 2)
         return surf
 
-    def update(self, world_speed_param, dt):
-        self.rect.x -= world_speed_param * self.speed_factor
-        if self.rect.right < 0:
-            self.rect.left = SCREEN_WIDTH
+    def respawn(self):
+        min_w_candidate_float = self.rect.width // 1.5
+        potential_min_w_float = min_w_candidate_float if min_w_candidate_float > 20 else 20.0
 
-            min_w_candidate_float = self.rect.width // 1.5
-            potential_min_w_float = min_w_candidate_float if min_w_candidate_float > 20 else 20.0
+        max_w_candidate_float = self.rect.width * 1.5
+        potential_max_w_float = max_w_candidate_float if max_w_candidate_float < 250 else 250.0
 
-            max_w_candidate_float = self.rect.width * 1.5
-            potential_max_w_float = max_w_candidate_float if max_w_candidate_float < 250 else 250.0
+        final_min_w = int(potential_min_w_float)
+        final_max_w = int(potential_max_w_float)
 
-            final_min_w = int(potential_min_w_float)
-            final_max_w = int(potential_max_w_float)
+        if final_min_w > final_max_w:
+            final_max_w = final_min_w
 
-            if final_min_w > final_max_w:
-                final_max_w = final_min_w
+        self.rect.width = self.rng.randint(final_min_w, final_max_w)
 
-            self.rect.width = random.randint(final_min_w, final_max_w)
+        # Генерируем новую высоту здания с учетом вариации
+        base_height = self.rect.height
+        self.current_height = base_height + self.rng.uniform(-self.height_variation, self.height_variation)
+        self.current_height = max(30.0, min(self.current_height, self.base_y * 0.8))
 
-            # Генерируем новую высоту здания с учетом вариации
-            base_height = self.rect.height
-            self.current_height = base_height + random.uniform(-self.height_variation, self.height_variation)
-            self.current_height = max(30.0, min(self.current_height, self.base_y * 0.8))
-            
-            # Ограничиваем высоту здания, чтобы оно не выходило за верхнюю границу земли
-            ground_height = int(LANE_YS[0] * 0.3)  # Такая же формула как в draw_ground
-            max_building_height = self.base_y - ground_height
-            self.current_height = min(self.current_height, max_building_height)
-            
-            self.rect.height = int(self.current_height)
-            self.rect.top = self.base_y - self.rect.height
+        # Ограничиваем высоту здания, чтобы оно не выходило за верхнюю границу земли
+        ground_height = int(LANE_YS[0] * 0.3)  # Такая же формула как в draw_ground
+        max_building_height = self.base_y - ground_height
+        self.current_height = min(self.current_height, max_building_height)
+
+        self.rect.height = int(self.current_height)
+        self.rect.top = self.base_y - self.rect.height
+
+        self._snow_caps = {}
+        self.image = self._render_building()
 
     def draw(self, surface, offset_x=0, offset_y=0, weather_system=None):
         draw_rect = self.rect.move(offset_x, offset_y)
-        pygame.draw.rect(surface, self.color, draw_rect)
-        darker_color = tuple(max(0, c - 20) for c in self.color)
-        pygame.draw.line(surface, darker_color, draw_rect.topleft, draw_rect.bottomleft, 3)
-        pygame.draw.line(surface, darker_color, draw_rect.topleft, draw_rect.topright, 3)
+        surface.blit(self.image, draw_rect)
         # Статичные снежные шапки
-        if weather_system and hasattr(weather_system, 'snow_level') and weather_system.snow_level > 0:
-            snow_cap = self._snow_caps.get(weather_system.snow_level)
-            if snow_cap:
-                surface.blit(snow_cap, (draw_rect.left, draw_rect.top - self.snow_height))
+        snow_level = getattr(weather_system, 'snow_level', 0) if weather_system else 0
+        if snow_level > 0:
+            surface.blit(self.get_snow_cap(snow_level), (draw_rect.left, draw_rect.top - self.snow_height))
 
-        if self.has_windows and self.rect.width > 20 and self.rect.height > 20:
-            win_size_w = max(5, int(self.rect.width * 0.15))
-            win_size_h = max(5, int(self.rect.height * 0.1))
-            gap_w = max(3, int(win_size_w * 0.5))
-            gap_h = max(3, int(win_size_h * 0.5))
+class ParallaxBand:
+    # Все здания одного слоя глубины собраны в широкую заранее отрисованную полосу,
+    # которая прокручивается по кругу с дробным смещением. Полоса шире экрана на margin,
+    # поэтому здание, ушедшее за левый край, и его замена появляются в невидимой части
+    # полосы - перерисовывается только эта часть
+    def __init__(self, elements, width=SCREEN_WIDTH, margin=PARALLAX_STRIP_MARGIN):
+        self.elements = elements
+        self.speed_factor = elements[0].speed_factor if elements else 0
+        self.width = width
+        self.strip_width = width + margin
+        self.offset = 0.0
+        for element in elements:
+            element.world_x = float(element.rect.x)
 
-            num_x = int((self.rect.width - gap_w) / (win_size_w + gap_w))
-            num_y = int((self.rect.height - gap_h) / (win_size_h + gap_h))
+        # Верх полосы - самая высокая возможная крыша со снежной шапкой
+        base_y = max(element.base_y for element in elements) if elements else 0
+        self.top = max(0, int(LANE_YS[0] * 0.3) - 12)
+        self.height = int(math.ceil(base_y)) - self.top + 1
+        self.rect = pygame.Rect(0, self.top, width, self.height)
+        self.strip = pygame.Surface((self.strip_width, self.height), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            self.strip = self.strip.convert_alpha()
+        self.snow_level = 0
+        self.recomposite_count = 0
+        self._composite_segment(self.offset, self.strip_width)
 
-            if num_x > 0 and num_y > 0:
-                for r_idx in range(num_y):
-                    for c_idx in range(num_x):
-                        win_x = draw_rect.left + gap_w + c_idx * (win_size_w + gap_w)
-                        win_y = draw_rect.top + gap_h + r_idx * (win_size_h + gap_h)
-                        if random.random() < 0.6:
-                            pygame.draw.rect(surface, WINDOW_COLOR, (win_x, win_y, win_size_w, win_size_h))
+    def _composite_segment(self, start_world_x, length):
+        start = int(math.floor(start_world_x)) % self.strip_width
+        pieces = [(start, min(self.strip_width, start + length))]
+        if start + length > self.strip_width:
+            pieces.append((0, start + length - self.strip_width))
 
-def draw_ground(surface, offset_x=0, offset_y=0, weather_system=None):
-    # Рисуем основную землю до дороги
+        for piece_start, piece_end in pieces:
+            self.strip.set_clip(pygame.Rect(piece_start, 0, piece_end - piece_start, self.height))
+            self.strip.fill((0, 0, 0, 0))
+            for element in self.elements:
+                strip_x = int(math.floor(element.world_x)) % self.strip_width
+                y = element.rect.top - self.top
+                cap = element.get_snow_cap(self.snow_level) if self.snow_level > 0 else None
+                # Здание может переходить через край полосы - рисуем и его «хвост» в начале
+                for x in (strip_x, strip_x - self.strip_width):
+                    self.strip.blit(element.image, (x, y))
+                    if cap is not None:
+                        self.strip.blit(cap, (x, y - element.snow_height))
+        self.strip.set_clip(None)
+        self.recomposite_count += 1
+
+    def update(self, world_speed_param, dt):
+        self.offset += world_speed_param * self.speed_factor * dt
+        recycled = False
+        for element in self.elements:
+            if element.world_x + element.rect.width - self.offset < 0:
+                element.world_x = self.offset + self.width
+                element.respawn()
+                recycled = True
+            element.rect.x = int(math.floor(element.world_x - self.offset))
+        if recycled:
+            # Перерисовываем только невидимую часть полосы, где были старое и новое здания
+            self._composite_segment(self.offset + self.width, self.strip_width - self.width)
+
+    def draw(self, surface, offset_x=0, offset_y=0, weather_system=None):
+        snow_level = getattr(weather_system, 'snow_level', 0) if weather_system else 0
+        if snow_level != self.snow_level:
+            self.snow_level = snow_level
+            self._composite_segment(self.offset, self.strip_width)
+
+        start = int(round(self.offset)) % self.strip_width
+        y = self.top + offset_y
+        first_width = min(self.width, self.strip_width - start)
+        surface.blit(self.strip, (offset_x, y), pygame.Rect(start, 0, first_width, self.height))
+        if first_width < self.width:
+            surface.blit(self.strip, (offset_x + first_width, y),
+                         pygame.Rect(0, 0, self.width - first_width, self.height))
+
+def get_ground_geometry():
     road_rect_y = LANE_YS[0] - PLAYER_SIZE[1] * 0.8
     ground_height = int(road_rect_y * 0.6)  # Земля занимает 60% пространства до дороги
     ground_y = int(road_rect_y - ground_height)  # Начинаем от дороги вверх
-    
-    # Создаем поверхность для земли
-    ground_surface = pygame.Surface((SCREEN_WIDTH, ground_height), pygame.SRCALPHA)
-    
+    return ground_y, ground_height
+
+def bake_ground(width, ground_height, snow_level=0):
+    ground_surface = pygame.Surface((width, ground_height))
+
     # Градиент земли
     for y in range(ground_height):
         progress = y / ground_height
@@ -336,59 +575,172 @@ def draw_ground(surface, offset_x=0, offset_y=0, weather_system=None):
             int(GROUND_COLOR_TOP[1] * (1 - progress) + GROUND_COLOR_BOTTOM[1] * progress),
             int(GROUND_COLOR_TOP[2] * (1 - progress) + GROUND_COLOR_BOTTOM[2] * progress)
         )
-        pygame.draw.line(ground_surface, color, (0, y), (SCREEN_WIDTH, y))
+        pygame.draw.line(ground_surface, color, (0, y), (width, y))
 
     # Ступенчатый снег на земле
-    snow_level = getattr(weather_system, 'snow_level', 0) if weather_system else 0
-    if snow_level > 0 and weather_system:
-        snow_surface = weather_system.get_static_snow_ground(ground_height, SCREEN_WIDTH)
-        ground_surface.blit(snow_surface, (0, 0))
+    if snow_level > 0:
+        ground_surface.blit(render_snow_ground(ground_height, width, snow_level), (0, 0))
     else:
-        # Рисуем статичную траву (используем seed для одинаковой генерации)
-        random.seed(42)  # Фиксированный seed для повторяемости
+        # Рисуем статичную траву (свой генератор с фиксированным seed для повторяемости)
+        rng = random.Random(42)
         grid_size = 40  # Увеличили размер ячейки
-        for grid_x in range(0, SCREEN_WIDTH, grid_size):
+        for grid_x in range(0, width, grid_size):
             for grid_y in range(0, ground_height, grid_size):
-                if random.random() < 0.7:  # 70% шанс травы в каждой ячейке
-                    x = grid_x + random.randint(0, grid_size//2)
-                    y = grid_y + random.randint(0, grid_size//2)
-                    
-                    num_blades = random.randint(2, 3)
+                if rng.random() < 0.7:  # 70% шанс травы в каждой ячейке
+                    x = grid_x + rng.randint(0, grid_size//2)
+                    y = grid_y + rng.randint(0, grid_size//2)
+
+                    num_blades = rng.randint(2, 3)
                     for _ in range(num_blades):
-                        grass_height = random.randint(8, 15)  # Увеличили высоту травы
-                        bend = random.randint(-3, 3)
-                        color_variation = random.randint(-10, 10)
+                        grass_height = rng.randint(8, 15)  # Увеличили высоту травы
+                        bend = rng.randint(-3, 3)
+                        color_variation = rng.randint(-10, 10)
                         grass_color = tuple(max(0, min(255, c + color_variation)) for c in GROUND_COLOR_TOP)
-                        
+
                         control_point = (x + bend, y - grass_height/2)
                         end_point = (x + bend*1.5, y - grass_height)
-                        
+
                         points = [(x, y), control_point, end_point]
                         pygame.draw.lines(ground_surface, grass_color, False, points, 2)
-                
+
                 # 30% шанс камней
-                elif random.random() < 0.3:
-                    x = grid_x + random.randint(0, grid_size//2)
-                    y = grid_y + random.randint(0, grid_size//2)
-                    size = random.randint(3, 7)
-                    color_variation = random.randint(-30, -10)
+                elif rng.random() < 0.3:
+                    x = grid_x + rng.randint(0, grid_size//2)
+                    y = grid_y + rng.randint(0, grid_size//2)
+                    size = rng.randint(3, 7)
+                    color_variation = rng.randint(-30, -10)
                     stone_color = tuple(max(0, min(255, c + color_variation)) for c in GROUND_COLOR_BOTTOM)
-                    
+
                     points = []
-                    num_points = random.randint(6, 8)
-                    
+                    num_points = rng.randint(6, 8)
+
                     for i in range(num_points):
                         angle = 2 * math.pi * i / num_points
-                        dist = size + random.randint(-1, 1)
+                        dist = size + rng.randint(-1, 1)
                         point_x = x + math.cos(angle) * dist
                         point_y = y + math.sin(angle) * dist
                         points.append((point_x, point_y))
-                    
+
                     if len(points) >= 3:
                         pygame.draw.polygon(ground_surface, stone_color, points)
-                        highlight_pos = (x + random.randint(-1, 1), y + random.randint(-1, 1))
+                        highlight_pos = (x + rng.randint(-1, 1), y + rng.randint(-1, 1))
                         pygame.draw.circle(ground_surface, tuple(min(255, c + 40) for c in stone_color), highlight_pos, 1)
-        random.seed()  # Сбрасываем seed
-    
-    # Отрисовываем всю землю разом
-    surface.blit(ground_surface, (offset_x, ground_y + offset_y)) 
\ No newline at end of file
+
+    if pygame.display.get_surface() is not None:
+        ground_surface = ground_surface.convert()
+    return ground_surface
+
+def get_ground_asset(snow_level, width, ground_height):
+    # Имя в кэше запечённых поверхностей (utils.assets) и функция построения
+    return (f"ground/{snow_level}/{width}x{ground_height}",
+            partial(bake_ground, width, ground_height, snow_level))
+
+def iter_baked_assets():
+    _, ground_height = get_ground_geometry()
+    for snow_level in range(3):
+        yield get_ground_asset(snow_level, SCREEN_WIDTH, ground_height)
+
+class GroundLayer:
+    # Земля вместе со снегом запекается один раз на каждое состояние (уровень снега, размер экрана),
+    # при смене уровня снега старое и новое состояния плавно смешиваются
+    def __init__(self, crossfade_sec=GROUND_CROSSFADE_SEC):
+        self.crossfade_sec = crossfade_sec
+        self._baked = {}
+        self._key = None
+        self._fade_from = None
+        self._fade_progress = 1.0
+
+    def get_surface(self, snow_level, width, ground_height):
+        key = (snow_level, width, ground_height)
+        if key not in self._baked:
+            self._baked[key] = get_baked(*get_ground_asset(snow_level, width, ground_height))
+        return self._baked[key]
+
+    def clear_cache(self):
+        self._baked = {}
+        self.reset()
+
+    def reset(self):
+        # Без плавной смены: следующий update() сразу покажет текущее состояние, запечённая земля остаётся
+        self._key = None
+        self._fade_from = None
+        self._fade_progress = 1.0
+
+    def update(self, width, weather_system=None, dt=None):
+        # Переключение состояния земли и продвижение плавной смены; без dt смена мгновенная.
+        # Только состояние, без поверхностей: вызывается на шаге симуляции, запекание - в draw()
+        ground_y, ground_height = get_ground_geometry()
+        snow_level = getattr(weather_system, 'snow_level', 0) if weather_system else 0
+        key = (snow_level, width, ground_height)
+
+        if key != self._key:
+            if self._key is not None and dt is not None and self.crossfade_sec > 0:
+                self._fade_from = self._key
+                self._fade_progress = 0.0
+            self._key = key
+
+        if self._fade_from is not None:
+            self._fade_progress = min(1.0, self._fade_progress + (dt or 0) / self.crossfade_sec)
+            if self._fade_progress >= 1.0:
+                self._fade_from = None
+
+    def get_state_key(self):
+        # Ключ того, что сейчас нарисовано: при его смене область земли нужно перерисовать
+        if self._fade_from is None:
+            return self._key, None
+        return self._key, int(255 * self._fade_progress)
+
+    def draw(self, surface, offset_x=0, offset_y=0, weather_system=None, dt=None, update=True):
+        if update or self._key is None:
+            self.update(surface.get_width(), weather_system, dt)
+        ground_y, _ = get_ground_geometry()
+        ground_surface = self.get_surface(*self._key)
+
+        position = (offset_x, ground_y + offset_y)
+        if self._fade_from is not None:
+            surface.blit(self.get_surface(*self._fade_from), position)
+            ground_surface.set_alpha(int(255 * self._fade_progress))
+            surface.blit(ground_surface, position)
+            ground_surface.set_alpha(None)
+            return
+
+        surface.blit(ground_surface, position)
+
+_default_ground_layer = GroundLayer()
+
+def draw_ground(surface, offset_x=0, offset_y=0, weather_system=None):
+    _default_ground_layer.draw(surface, offset_x, offset_y, weather_system)
+
+def get_road_top():
+    return LANE_YS[0] - PLAYER_SIZE[1] * 0.8
+
+def draw_road(surface, offset_x=0, offset_y=0):
+    # Полотно дороги и её границы (без разметки)
+    road_rect_y = get_road_top()
+    pygame.draw.rect(surface, ROAD_COLOR, (
+        0 + offset_x, road_rect_y + offset_y, SCREEN_WIDTH, SCREEN_HEIGHT - road_rect_y))
+    pygame.draw.rect(surface, (150, 150, 150),
+                     (0 + offset_x, road_rect_y + offset_y - 5, SCREEN_WIDTH, 5))
+    pygame.draw.rect(surface, (150, 150, 150),
+                     (0 + offset_x, LANE_YS[-1] + PLAYER_SIZE[1] * 0.2 + offset_y, SCREEN_WIDTH, 5))
+
+def get_road_marking_rects():
+    # Полосы экрана, которые занимает прерывистая разметка
+    return [pygame.Rect(0, int(line_y) - 3, SCREEN_WIDTH, 7)
+            for line_y in ((LANE_YS[0] + LANE_YS[1]) / 2, (LANE_YS[1] + LANE_YS[2]) / 2)]
+
+def draw_road_markings(surface, scroll, offset_x=0, offset_y=0):
+    # scroll - пройденное миром расстояние, px
+    line_y_center = (LANE_YS[0] + LANE_YS[1]) / 2 + offset_y
+    line_y_bottom = (LANE_YS[1] + LANE_YS[2]) / 2 + offset_y
+
+    segment_length = 60
+    gap_length = 40
+    total_pattern_length = segment_length + gap_length
+    start_x_offset = int(((scroll * ROAD_MARKING_SCROLL_FACTOR) % total_pattern_length) * -1)
+
+    for x_pos in range(start_x_offset, SCREEN_WIDTH, total_pattern_length):
+        pygame.draw.line(surface, ROAD_LINE_COLOR, (x_pos + offset_x, line_y_center),
+                         (x_pos + segment_length + offset_x, line_y_center), 5)
+        pygame.draw.line(surface, ROAD_LINE_COLOR, (x_pos + offset_x, line_y_bottom),
+                         (x_pos + segment_length + offset_x, line_y_bottom), 5)
@@ -1,100 +1,211 @@
 import pygame
-import random
 import math
-from config import (SCREEN_WIDTH, OBSTACLE_BASE_SIZE, BOOSTER_RADIUS,
-                   RISK_COLORS, POLICY_COLORS, BLACK, RED, LANE_YS)
+from functools import partial
+from config import (SCREEN_WIDTH, OBSTACLE_BASE_SIZE, BOOSTER_RADIUS, BOOSTER_ANIM_FRAMES,
+                   RISK_COLORS, POLICY_COLORS, BLACK, RED, LANE_YS, RISK_TYPES, POLICY_TYPES)
+from utils.assets import get_baked
 from utils.drawing import draw_text, get_font
+from utils.rng import get_rng
 
 class MovingObject(pygame.sprite.Sprite):
+    # Имя потока случайных чисел (utils.rng) для положения при появлении
+    rng_stream = "obstacles"
+    # utils.pool.SpritePool, в который спрайт возвращается при kill()
+    pool = None
+
     def __init__(self, image, world_speed, lane_y_options):
         super().__init__()
+        self.place(image, world_speed, lane_y_options)
+
+    def place(self, image, world_speed, lane_y_options):
+        # Новое положение за правым краем экрана (при создании и при повторном использовании из пула)
         self.image = image
-        self.rect = self.image.get_rect(
-            bottomleft=(SCREEN_WIDTH + random.randint(50, 200), random.choice(lane_y_options)))
+        rng = get_rng(self.rng_stream)
+        lane_y = rng.choice(lane_y_options)
+        self.rect = self.image.get_rect(bottomleft=(SCREEN_WIDTH + rng.randint(50, 200), lane_y))
+        # Полоса для utils.collisions.LaneGroup
+        self.lane_index = LANE_YS.index(lane_y)
         self.spawn_world_speed = world_speed
+        # Дробная позиция по x и её значение на предыдущем шаге симуляции (для интерполяции)
+        self.x = float(self.rect.x)
+        self.prev_x = self.x
+
+    def get_render_rect(self, alpha=1.0):
+        return self.rect.move(round(self.prev_x + (self.x - self.prev_x) * alpha) - self.rect.x, 0)
 
     def update(self, world_speed_param, dt):
-        self.rect.x -= world_speed_param
+        # world_speed_param - скорость мира в px/с
+        self.prev_x = self.x
+        self.x -= world_speed_param * dt
+        self.rect.x = round(self.x)
         if self.rect.right < 0:
             self.kill()
 
+    def kill(self):
+        was_alive = self.alive()
+        super().kill()
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
+
+def render_obstacle_surface(risk_type):
+    s = OBSTACLE_BASE_SIZE
+    surf = None
+    color = RISK_COLORS.get(risk_type, RED)
+
+    if risk_type == "tree":
+        surf = pygame.Surface((s, int(s * 1.4)), pygame.SRCALPHA)
+        pygame.draw.rect(surf, color, (s * 0.35, s * 0.6, s * 0.3, s * 0.8))
+        pygame.draw.circle(surf, (30, 150, 30), (s * 0.5, s * 0.35), s * 0.35)
+        pygame.draw.circle(surf, (40, 160, 40), (s * 0.25, s * 0.5), s * 0.25)
+        pygame.draw.circle(surf, (20, 140, 20), (s * 0.75, s * 0.55), s * 0.3)
+    elif risk_type == "phone":
+        surf = pygame.Surface((s * 0.6, s * 0.6), pygame.SRCALPHA)
+        pygame.draw.rect(surf, color, (0, 0, s * 0.6, s * 0.6), border_radius=5)
+        pygame.draw.rect(surf, (30, 30, 30), (s * 0.05, s * 0.05, s * 0.5, s * 0.3))
+        pygame.draw.circle(surf, (60, 60, 60), (s * 0.3, s * 0.5), s * 0.08)
+    elif risk_type == "accident":
+        surf = pygame.Surface((s * 1.5, s * 0.8), pygame.SRCALPHA)
+        rect1 = pygame.Rect(0, s * 0.1, s * 0.8, s * 0.6)
+        rect2 = pygame.Rect(s * 0.5, 0, s * 0.8, s * 0.6)
+        points1 = [(rect1.left, rect1.top + 5), (rect1.right - 10, rect1.top), (rect1.right, rect1.bottom - 5),
+                   (rect1.left + 10, rect1.bottom)]
+        points2 = [(rect2.left + 5, rect2.top), (rect2.right, rect2.top + 10), (rect2.right - 5, rect2.bottom),
+                   (rect2.left, rect2.bottom - 10)]
+        pygame.draw.polygon(surf, (200, 50, 50), points1)
+        pygame.draw.polygon(surf, (80, 80, 180), points2)
+        pygame.draw.polygon(surf, BLACK, points1, 2)
+        pygame.draw.polygon(surf, BLACK, points2, 2)
+    elif risk_type == "bill":
+        surf = pygame.Surface((s * 0.8, s * 0.7), pygame.SRCALPHA)
+        for i in range(3):
+            offset = i * 3
+            pygame.draw.rect(surf, (220 - i * 10, 220 - i * 10, 200 - i * 10),
+                             (offset, offset, s * 0.8 - offset * 1.5, s * 0.7 - offset * 1.5))
+            pygame.draw.rect(surf, (50, 50, 50), (offset, offset, s * 0.8 - offset * 1.5, s * 0.7 - offset * 1.5), 1)
+        for r_idx in range(3):
+            pygame.draw.line(surf, (100, 100, 100), (5, 10 + r_idx * 5), (s * 0.8 - 10, 10 + r_idx * 5), 1)
+
+    if surf is None:
+        surf = pygame.Surface((s, s), pygame.SRCALPHA)
+        surf.fill(color)
+        draw_text(surf, risk_type[0].upper(), int(s * 0.7), s / 2, s / 2, BLACK, anchor="center")
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert_alpha()
+    return surf
+
+def get_obstacle_asset(risk_type):
+    # Имя в кэше запечённых поверхностей (utils.assets) и функция построения
+    return f"obstacle/{risk_type}", partial(render_obstacle_surface, risk_type)
+
 class Obstacle(MovingObject):
+    # Одна поверхность и маска на тип риска, общие для всех препятствий этого типа
+    _surfaces = {}
+    _masks = {}
+
+    @classmethod
+    def get_surface(cls, risk_type):
+        surf = cls._surfaces.get(risk_type)
+        if surf is None:
+            surf = get_baked(*get_obstacle_asset(risk_type))
+            cls._surfaces[risk_type] = surf
+        return surf
+
+    @classmethod
+    def get_mask(cls, risk_type):
+        mask = cls._masks.get(risk_type)
+        if mask is None:
+            mask = pygame.mask.from_surface(cls.get_surface(risk_type))
+            cls._masks[risk_type] = mask
+        return mask
+
     def __init__(self, world_speed, risk_type):
+        pygame.sprite.Sprite.__init__(self)
+        self.reset(world_speed, risk_type)
+
+    def reset(self, world_speed, risk_type):
         self.risk_type = risk_type
         self.image = self.create_obstacle_surface()
-        lane_y = random.choice(LANE_YS)
-        super().__init__(self.image, world_speed, [lane_y])
+        self.mask = self.get_mask(risk_type)
+        lane_y = get_rng(self.rng_stream).choice(LANE_YS)
+        self.place(self.image, world_speed, [lane_y])
         self.rect.bottom = lane_y
 
     def create_obstacle_surface(self):
-        s = OBSTACLE_BASE_SIZE
-        surf = None
-        color = RISK_COLORS.get(self.risk_type, RED)
-
-        if self.risk_type == "tree":
-            surf = pygame.Surface((s, int(s * 1.4)), pygame.SRCALPHA)
-            pygame.draw.rect(surf, color, (s * 0.35, s * 0.6, s * 0.3, s * 0.8))
-            pygame.draw.circle(surf, (30, 150, 30), (s * 0.5, s * 0.35), s * 0.35)
-            pygame.draw.circle(surf, (40, 160, 40), (s * 0.25, s * 0.5), s * 0.25)
-            pygame.draw.circle(surf, (20, 140, 20), (s * 0.75, s * 0.55), s * 0.3)
-        elif self.risk_type == "phone":
-            surf = pygame.Surface((s * 0.6, s * 0.6), pygame.SRCALPHA)
-            pygame.draw.rect(surf, color, (0, 0, s * 0.6, s * 0.6), border_radius=5)
-            pygame.draw.rect(surf, (30, 30, 30), (s * 0.05, s * 0.05, s * 0.5, s * 0.3))
-            pygame.draw.circle(surf, (60, 60, 60), (s * 0.3, s * 0.5), s * 0.08)
-        elif self.risk_type == "accident":
-            surf = pygame.Surface((s * 1.5, s * 0.8), pygame.SRCALPHA)
-            rect1 = pygame.Rect(0, s * 0.1, s * 0.8, s * 0.6)
-            rect2 = pygame.Rect(s * 0.5, 0, s * 0.8, s * 0.6)
-            points1 = [(rect1.left, rect1.top + 5), (rect1.right - 10, rect1.top), (rect1.right, rect1.bottom - 5),
-                       (rect1.left + 10, rect1.bottom)]
-            points2 = [(rect2.left + 5, rect2.top), (rect2.right, rect2.top + 10), (rect2.right - 5, rect2.bottom),
-                       (rect2.left, rect2.bottom - 10)]
-            pygame.draw.polygon(surf, (200, 50, 50), points1)
-            pygame.draw.polygon(surf, (80, 80, 180), points2)
-            pygame.draw.polygon(surf, BLACK, points1, 2)
-            pygame.draw.polygon(surf, BLACK, points2, 2)
-        elif self.risk_type == "bill":
-            surf = pygame.Surface((s * 0.8, s * 0.7), pygame.SRCALPHA)
-            for i in range(3):
-                offset = i * 3
-                pygame.draw.rect(surf, (220 - i * 10, 220 - i * 10, 200 - i * 10),
-                                 (offset, offset, s * 0.8 - offset * 1.5, s * 0.7 - offset * 1.5))
-                pygame.draw.rect(surf, (50, 50, 50), (offset, offset, s * 0.8 - offset * 1.5, s * 0.7 - offset * 1.5), 1)
-            for r_idx in range(3):
-                pygame.draw.line(surf, (100, 100, 100), (5, 10 + r_idx * 5), (s * 0.8 - 10, 10 + r_idx * 5), 1)
+        return self.get_surface(self.risk_type)
 
-        if surf is None:
-            surf = pygame.Surface((s, s), pygame.SRCALPHA)
-            surf.fill(color)
-            draw_text(surf, self.risk_type[0].upper(), int(s * 0.7), s / 2, s / 2, BLACK, anchor="center")
-        return surf
+def render_booster_frame(policy_type, anim_timer):
+    base_color = POLICY_COLORS.get(policy_type, (0, 255, 0))
+    scale_factor = 0.8 + 0.2 * (math.sin(anim_timer) * 0.5 + 0.5)
+    current_radius = int(BOOSTER_RADIUS * scale_factor)
+
+    image = pygame.Surface((BOOSTER_RADIUS * 2, BOOSTER_RADIUS * 2), pygame.SRCALPHA)
+    center = (BOOSTER_RADIUS, BOOSTER_RADIUS)
+
+    glow_color = (*base_color, 80)
+    pygame.draw.circle(image, glow_color, center, current_radius)
+    pygame.draw.circle(image, base_color, center, int(current_radius * 0.8))
+    font = get_font(int(current_radius * 0.8), 'Impact')
+    text_surf = font.render(policy_type[0].upper(), True, BLACK)
+    text_rect = text_surf.get_rect(center=center)
+    image.blit(text_surf, text_rect)
+    if pygame.display.get_surface() is not None:
+        image = image.convert_alpha()
+    return image
+
+def get_booster_frame_assets(policy_type):
+    # Кадры цикла пульсации: имена в кэше запечённых поверхностей и функции построения
+    return [(f"booster/{policy_type}/{i}", partial(render_booster_frame, policy_type, 2 * math.pi * i / BOOSTER_ANIM_FRAMES))
+            for i in range(BOOSTER_ANIM_FRAMES)]
+
+def iter_baked_assets():
+    for risk_type in RISK_TYPES:
+        yield get_obstacle_asset(risk_type)
+    for policy_type in POLICY_TYPES:
+        yield from get_booster_frame_assets(policy_type)
 
 class Booster(MovingObject):
+    # Один цикл пульсации на каждый тип полиса, общий для всех бустеров этого типа, и маски его кадров
+    _anim_frames = {}
+    _anim_masks = {}
+    rng_stream = "boosters"
+
+    @classmethod
+    def get_anim_frames(cls, policy_type):
+        frames = cls._anim_frames.get(policy_type)
+        if frames is None:
+            frames = [get_baked(*asset) for asset in get_booster_frame_assets(policy_type)]
+            cls._anim_frames[policy_type] = frames
+        return frames
+
+    @classmethod
+    def get_anim_masks(cls, policy_type):
+        masks = cls._anim_masks.get(policy_type)
+        if masks is None:
+            # Низкий порог альфы: полупрозрачное свечение тоже подбирает бустер
+            masks = [pygame.mask.from_surface(frame, 50) for frame in cls.get_anim_frames(policy_type)]
+            cls._anim_masks[policy_type] = masks
+        return masks
+
     def __init__(self, world_speed, policy_type):
+        pygame.sprite.Sprite.__init__(self)
+        self.reset(world_speed, policy_type)
+
+    def reset(self, world_speed, policy_type):
         self.policy_type = policy_type
         self.base_color = POLICY_COLORS.get(policy_type, (0, 255, 0))
-        self.image = pygame.Surface((BOOSTER_RADIUS * 2, BOOSTER_RADIUS * 2), pygame.SRCALPHA)
-        self.anim_timer = random.uniform(0, 2 * math.pi)
+        self.frames = self.get_anim_frames(policy_type)
+        self.masks = self.get_anim_masks(policy_type)
+        # Случайная начальная фаза, чтобы бустеры не пульсировали синхронно
+        self.anim_timer = get_rng(self.rng_stream).uniform(0, 2 * math.pi)
         self.update_image(0)
-        super().__init__(self.image, world_speed, LANE_YS)
+        self.place(self.image, world_speed, LANE_YS)
 
     def update_image(self, dt):
-        self.anim_timer += dt * 4
-        scale_factor = 0.8 + 0.2 * (math.sin(self.anim_timer) * 0.5 + 0.5)
-        current_radius = int(BOOSTER_RADIUS * scale_factor)
-
-        self.image.fill((0, 0, 0, 0))
-        center = (BOOSTER_RADIUS, BOOSTER_RADIUS)
-
-        glow_color = (*self.base_color, 80)
-        pygame.draw.circle(self.image, glow_color, center, current_radius)
-        pygame.draw.circle(self.image, self.base_color, center, int(current_radius * 0.8))
-        font = get_font(int(current_radius * 0.8), 'Impact')
-        text_surf = font.render(self.policy_type[0].upper(), True, BLACK)
-        text_rect = text_surf.get_rect(center=center)
-        self.image.blit(text_surf, text_rect)
+        self.anim_timer = (self.anim_timer + dt * 4) % (2 * math.pi)
+        frame = int(self.anim_timer * BOOSTER_ANIM_FRAMES / (2 * math.pi)) % BOOSTER_ANIM_FRAMES
+        self.image = self.frames[frame]
+        self.mask = self.masks[frame]
 
     def update(self, world_speed_param, dt):
         super().update(world_speed_param, dt)
-        self.update_image(dt) 
\ No newline at end of file
+        self.update_image(dt)
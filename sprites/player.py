@@ -1,11 +1,173 @@
 import pygame
-import random
 import math
-from config import (PLAYER_SIZE, PLAYER_START_X, LANE_YS, BLUE_PLAYER,
-                   BLACK)
-from utils.particles import Particle
+import numpy as np
+from collections import OrderedDict
+from config import (PLAYER_SIZE, PLAYER_START_X, LANE_YS, BLUE_PLAYER, PLAYER_TILT_STEP,
+                   PLAYER_EYE_PHASES, PLAYER_POSE_CACHE_SIZE,
+                   PARTICLE_ADDITIVE_JETPACK)
+from utils.particles import emit_particles, particle_rng
+from utils.rng import get_rng
+from utils.assets import get_baked
+
+JETPACK_COLORS = np.array([(255, 100, 0), (255, 150, 30), (255, 200, 80)], dtype=np.uint8)
+JUMP_COLORS = np.array([(255, 220, 120), (255, 250, 180), (255, 255, 0)], dtype=np.uint8)
+
+# Период анимации глаз: sin(t * 2.5) и sin(t * 1.5) одновременно повторяются через 4π
+EYE_ANIM_PERIOD = 4 * math.pi
+
+def render_player_pose(tilt, anim_timer, image_buffer=5):
+    base_width, base_height = PLAYER_SIZE
+    image = pygame.Surface((base_width + image_buffer * 2, base_height + image_buffer * 2), pygame.SRCALPHA)
+    player_drawing_surf = pygame.Surface((base_width, base_height), pygame.SRCALPHA)
+    player_drawing_surf.fill((0, 0, 0, 0))
+
+    main_color = BLUE_PLAYER
+    highlight_color = tuple(min(255, c + 40) for c in main_color)
+    shadow_color = tuple(max(0, c - 30) for c in main_color)
+    detail_color_dark = (40, 60, 100)
+    detail_color_light = (150, 180, 240)
+    eye_base_color = (220, 255, 255)
+
+    body_height_ratio = 0.80
+    body_y_start = base_height * (1 - body_height_ratio)
+
+    body_points = [
+        (base_width * 0.1, body_y_start),
+        (base_width * 0.9, body_y_start),
+        (base_width, base_height * 0.95),
+        (base_width * 0.7, base_height),
+        (base_width * 0.3, base_height),
+        (0, base_height * 0.95)
+    ]
+    pygame.draw.polygon(player_drawing_surf, main_color, body_points)
+    pygame.draw.polygon(player_drawing_surf, shadow_color, body_points, 2)
+
+    body_highlight_rect = pygame.Rect(base_width * 0.2, body_y_start + 2, base_width * 0.6,
+                                      base_height * 0.15)
+    pygame.draw.ellipse(player_drawing_surf, highlight_color, body_highlight_rect)
+
+    head_height = base_height * 0.35
+    head_width = base_width * 0.8
+    head_x = (base_width - head_width) / 2
+    head_y = 0
+
+    head_rect = pygame.Rect(head_x, head_y, head_width, head_height)
+    pygame.draw.ellipse(player_drawing_surf, detail_color_light, head_rect)
+    pygame.draw.ellipse(player_drawing_surf, shadow_color, head_rect, 2)
+
+    eye_anim_scale = 0.9 + 0.1 * (math.sin(anim_timer * 2.5) * 0.5 + 0.5)
+    eye_width = head_width * 0.6 * eye_anim_scale
+    eye_height = head_height * 0.4 * eye_anim_scale
+    eye_x = (base_width - eye_width) / 2
+    eye_y = head_y + head_height * 0.25
+    eye_rect = pygame.Rect(eye_x, eye_y, eye_width, eye_height)
+
+    eye_brightness = 0.8 + 0.2 * (math.sin(anim_timer * 1.5 + math.pi / 2) * 0.5 + 0.5)
+    current_eye_color = tuple(int(c * eye_brightness) for c in eye_base_color)
+    pygame.draw.ellipse(player_drawing_surf, current_eye_color, eye_rect)
+    pygame.draw.ellipse(player_drawing_surf, detail_color_dark, eye_rect, 1)
+
+    panel_width = base_width * 0.15
+    panel_height = base_height * 0.4
+    panel_y = body_y_start + base_height * 0.1
+    pygame.draw.rect(player_drawing_surf, shadow_color,
+                     (base_width * 0.05, panel_y, panel_width, panel_height), border_radius=3)
+    pygame.draw.rect(player_drawing_surf, shadow_color,
+                     (base_width * 0.80, panel_y, panel_width, panel_height), border_radius=3)
+
+    nozzle_radius = base_width * 0.08
+    nozzle_y = base_height - nozzle_radius * 0.8
+    pygame.draw.circle(player_drawing_surf, detail_color_dark, (base_width * 0.35, nozzle_y), nozzle_radius)
+    pygame.draw.circle(player_drawing_surf, detail_color_dark, (base_width * 0.65, nozzle_y), nozzle_radius)
+
+    if tilt != 0:
+        rotated_surf = pygame.transform.rotate(player_drawing_surf, tilt)
+        new_rect = rotated_surf.get_rect(center=(image.get_width() / 2, image.get_height() / 2))
+        image.blit(rotated_surf, new_rect)
+    else:
+        image.blit(player_drawing_surf, player_drawing_surf.get_rect(
+            center=(image.get_width() / 2, image.get_height() / 2)))
+    return image
+
+class PlayerPoseAtlas:
+    # Кадры игрока для квантованных углов наклона и фаз анимации глаз.
+    # Кадры строятся лениво и хранятся в ограниченном LRU-кэше (или все сразу через prebuild).
+    # Маски для столкновений зависят только от наклона (глаза не меняют силуэт) и не вытесняются
+    def __init__(self, tilt_step=PLAYER_TILT_STEP, eye_phases=PLAYER_EYE_PHASES, max_frames=PLAYER_POSE_CACHE_SIZE,
+                 image_buffer=5):
+        self.tilt_step = tilt_step
+        self.eye_phases = eye_phases
+        self.max_frames = max_frames
+        self.image_buffer = image_buffer
+        self._frames = OrderedDict()
+        self._masks = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def quantize(self, tilt, anim_timer):
+        tilt_index = round(tilt / self.tilt_step) if self.tilt_step > 0 else tilt
+        phase_index = int((anim_timer % EYE_ANIM_PERIOD) / EYE_ANIM_PERIOD * self.eye_phases) % self.eye_phases
+        return tilt_index, phase_index
+
+    def get_frame(self, tilt, anim_timer):
+        return self.get_frame_by_key(self.quantize(tilt, anim_timer))
+
+    def get_frame_by_key(self, key):
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+            self.stats["hits"] += 1
+            return frame
+
+        self.stats["misses"] += 1
+        frame = get_baked(*self.get_asset(key))
+        self._frames[key] = frame
+        if len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+        return frame
+
+    def get_asset(self, key):
+        # Имя кадра в кэше запечённых поверхностей (utils.assets) и функция построения
+        tilt_index, phase_index = key
+        quantized_tilt = tilt_index * self.tilt_step if self.tilt_step > 0 else tilt_index
+
+        def build():
+            frame = render_player_pose(quantized_tilt, phase_index * EYE_ANIM_PERIOD / self.eye_phases,
+                                       self.image_buffer)
+            if pygame.display.get_surface() is not None:
+                frame = frame.convert_alpha()
+            return frame
+        return f"player/{quantized_tilt}/{phase_index}of{self.eye_phases}/{self.image_buffer}", build
+
+    def iter_keys(self, min_tilt=-20, max_tilt=18):
+        if self.tilt_step <= 0:
+            return
+        for tilt_index in range(math.floor(min_tilt / self.tilt_step), math.ceil(max_tilt / self.tilt_step) + 1):
+            for phase_index in range(self.eye_phases):
+                yield tilt_index, phase_index
+
+    def get_mask(self, tilt):
+        tilt_index = self.quantize(tilt, 0)[0]
+        mask = self._masks.get(tilt_index)
+        if mask is None:
+            mask = pygame.mask.from_surface(self.get_frame(tilt, 0))
+            self._masks[tilt_index] = mask
+        return mask
+
+    def prebuild(self, min_tilt=-20, max_tilt=18):
+        for key in self.iter_keys(min_tilt, max_tilt):
+            self.get_frame_by_key(key)
+
+    def __len__(self):
+        return len(self._frames)
+
+def iter_baked_assets():
+    atlas = PlayerPoseAtlas()
+    for key in atlas.iter_keys():
+        yield atlas.get_asset(key)
 
 class Player(pygame.sprite.Sprite):
+    pose_atlas = None
+
     def __init__(self):
         super().__init__()
         self.base_width, self.base_height = PLAYER_SIZE
@@ -13,14 +175,26 @@ class Player(pygame.sprite.Sprite):
         self.image = pygame.Surface((self.base_width + self.image_buffer * 2, self.base_height + self.image_buffer * 2),
                                     pygame.SRCALPHA)
         self.rect = self.image.get_rect(midbottom=(PLAYER_START_X, LANE_YS[1]))
-        
-        # Создаем отдельный rect для коллизий, который всегда остается на полосе
-        self.collision_rect = self.rect.copy()
+
+        self.jump_power = -1800  # px/с
+        self.gravity = 1440  # px/с²
+
+        if Player.pose_atlas is None:
+            Player.pose_atlas = PlayerPoseAtlas(image_buffer=self.image_buffer)
+
+        self.reset()
+
+    def reset(self):
+        # Начальное состояние раунда; поверхности и атлас поз не пересоздаются
+        self.rect.midbottom = (PLAYER_START_X, LANE_YS[1])
+
+        # Положение по вертикали (низ спрайта) хранится дробным; prev_bottom - состояние
+        # на предыдущем шаге симуляции для интерполяции при отрисовке
+        self.bottom = float(self.rect.bottom)
+        self.prev_bottom = self.bottom
 
         self.current_lane_index = 1
         self.is_jumping = False
-        self.jump_power = -30
-        self.gravity = 0.4
         self.y_velocity = 0
         self.jump_offset = 0
         self.can_collide = True
@@ -29,7 +203,7 @@ class Player(pygame.sprite.Sprite):
         self.anim_y_offset = 0
 
         self.jetpack_timer = 0
-        self.anim_timer = random.uniform(0, 2 * math.pi)
+        self.anim_timer = get_rng("player").uniform(0, 2 * math.pi)
 
         self.current_tilt = 0
         self.target_tilt = 0
@@ -37,87 +211,28 @@ class Player(pygame.sprite.Sprite):
         self.draw_player_shape()
 
     def draw_player_shape(self):
-        self.image.fill((0, 0, 0, 0))
-
-        player_drawing_surf = pygame.Surface((self.base_width, self.base_height), pygame.SRCALPHA)
-        player_drawing_surf.fill((0, 0, 0, 0))
-
-        main_color = BLUE_PLAYER
-        highlight_color = tuple(min(255, c + 40) for c in main_color)
-        shadow_color = tuple(max(0, c - 30) for c in main_color)
-        detail_color_dark = (40, 60, 100)
-        detail_color_light = (150, 180, 240)
-        eye_base_color = (220, 255, 255)
-
-        body_height_ratio = 0.80
-        body_y_start = self.base_height * (1 - body_height_ratio)
-
-        body_points = [
-            (self.base_width * 0.1, body_y_start),
-            (self.base_width * 0.9, body_y_start),
-            (self.base_width, self.base_height * 0.95),
-            (self.base_width * 0.7, self.base_height),
-            (self.base_width * 0.3, self.base_height),
-            (0, self.base_height * 0.95)
-        ]
-        pygame.draw.polygon(player_drawing_surf, main_color, body_points)
-        pygame.draw.polygon(player_drawing_surf, shadow_color, body_points, 2)
-
-        body_highlight_rect = pygame.Rect(self.base_width * 0.2, body_y_start + 2, self.base_width * 0.6,
-                                          self.base_height * 0.15)
-        pygame.draw.ellipse(player_drawing_surf, highlight_color, body_highlight_rect)
-
-        head_height = self.base_height * 0.35
-        head_width = self.base_width * 0.8
-        head_x = (self.base_width - head_width) / 2
-        head_y = 0
-
-        head_rect = pygame.Rect(head_x, head_y, head_width, head_height)
-        pygame.draw.ellipse(player_drawing_surf, detail_color_light, head_rect)
-        pygame.draw.ellipse(player_drawing_surf, shadow_color, head_rect, 2)
-
-        eye_anim_scale = 0.9 + 0.1 * (math.sin(self.anim_timer * 2.5) * 0.5 + 0.5)
-        eye_width = head_width * 0.6 * eye_anim_scale
-        eye_height = head_height * 0.4 * eye_anim_scale
-        eye_x = (self.base_width - eye_width) / 2
-        eye_y = head_y + head_height * 0.25
-        eye_rect = pygame.Rect(eye_x, eye_y, eye_width, eye_height)
-
-        eye_brightness = 0.8 + 0.2 * (math.sin(self.anim_timer * 1.5 + math.pi / 2) * 0.5 + 0.5)
-        current_eye_color = tuple(int(c * eye_brightness) for c in eye_base_color)
-        pygame.draw.ellipse(player_drawing_surf, current_eye_color, eye_rect)
-        pygame.draw.ellipse(player_drawing_surf, detail_color_dark, eye_rect, 1)
-
-        panel_width = self.base_width * 0.15
-        panel_height = self.base_height * 0.4
-        panel_y = body_y_start + self.base_height * 0.1
-        pygame.draw.rect(player_drawing_surf, shadow_color,
-                         (self.base_width * 0.05, panel_y, panel_width, panel_height), border_radius=3)
-        pygame.draw.rect(player_drawing_surf, shadow_color,
-                         (self.base_width * 0.80, panel_y, panel_width, panel_height), border_radius=3)
-
-        nozzle_radius = self.base_width * 0.08
-        nozzle_y = self.base_height - nozzle_radius * 0.8
-        pygame.draw.circle(player_drawing_surf, detail_color_dark, (self.base_width * 0.35, nozzle_y), nozzle_radius)
-        pygame.draw.circle(player_drawing_surf, detail_color_dark, (self.base_width * 0.65, nozzle_y), nozzle_radius)
-
-        if self.current_tilt != 0:
-            rotated_surf = pygame.transform.rotate(player_drawing_surf, self.current_tilt)
-            new_rect = rotated_surf.get_rect(center=(self.image.get_width() / 2, self.image.get_height() / 2))
-            self.image.blit(rotated_surf, new_rect)
-        else:
-            self.image.blit(player_drawing_surf, player_drawing_surf.get_rect(
-                center=(self.image.get_width() / 2, self.image.get_height() / 2)))
+        self.image = self.pose_atlas.get_frame(self.current_tilt, self.anim_timer)
+        self.mask = self.pose_atlas.get_mask(self.current_tilt)
+
+    def set_bottom(self, bottom):
+        # Верх спрайта не должен уходить за экран
+        self.bottom = max(float(self.rect.height), bottom)
+        self.rect.bottom = round(self.bottom)
+
+    def get_render_rect(self, alpha=1.0):
+        # Прямоугольник для отрисовки между предыдущим и текущим шагом симуляции
+        return self.rect.move(0, round(self.prev_bottom + (self.bottom - self.prev_bottom) * alpha) - self.rect.bottom)
 
     def update(self, dt):
+        self.prev_bottom = self.bottom
         self.anim_timer += dt * 3.5
         tilt_speed_factor = dt * 10
         self.current_tilt += (self.target_tilt - self.current_tilt) * tilt_speed_factor
 
         if self.is_jumping:
             self.can_collide = False
-            self.y_velocity += self.gravity
-            self.jump_offset += self.y_velocity
+            self.y_velocity += self.gravity * dt
+            self.jump_offset += self.y_velocity * dt
 
             # Ограничиваем максимальную высоту прыжка
             if self.jump_offset < -180:
@@ -131,7 +246,7 @@ class Player(pygame.sprite.Sprite):
                 self.target_tilt = 15
 
             # Обновляем позицию относительно текущей полосы
-            self.rect.bottom = self.base_y_on_lane + self.jump_offset
+            self.set_bottom(self.base_y_on_lane + self.jump_offset)
 
             # Проверяем приземление
             if self.jump_offset >= 0:
@@ -140,37 +255,36 @@ class Player(pygame.sprite.Sprite):
                 self.y_velocity = 0
                 self.target_tilt = 0
                 self.can_collide = True  # Включаем коллизии после приземления
-                return [Particle(
-                    self.rect.centerx + random.uniform(-self.base_width / 2.5, self.base_width / 2.5),
+                self.set_bottom(self.base_y_on_lane)
+                return emit_particles(
+                    10,
+                    self.rect.centerx + particle_rng.uniform(-self.base_width / 2.5, self.base_width / 2.5, 10),
                     self.rect.bottom,
-                    (160, 160, 160), random.uniform(2.5, 5),
-                    random.uniform(-50, 50), random.uniform(-60, -25), 280, 0.45
-                ) for _ in range(10)]
+                    (160, 160, 160), particle_rng.uniform(2.5, 5, 10),
+                    particle_rng.uniform(-50, 50, 10), particle_rng.uniform(-60, -25, 10), 280, 0.45
+                )
 
             # Частицы джетпака
             self.jetpack_timer -= dt
             if self.jetpack_timer <= 0:
-                particles = []
-                for i in [-1, 1]:
-                    start_x = self.rect.centerx + i * (self.base_width * 0.2)
-                    start_y = self.rect.bottom - self.image_buffer
-                    particles.append(Particle(
-                        start_x, start_y,
-                        random.choice([(255, 100, 0), (255, 150, 30), (255, 200, 80)]),
-                        random.uniform(4, 7),
-                        random.uniform(-20, 20),
-                        random.uniform(50, 100),
-                        -50, 0.3
-                    ))
+                start_x = [self.rect.centerx - self.base_width * 0.2, self.rect.centerx + self.base_width * 0.2]
+                start_y = self.rect.bottom - self.image_buffer
+                particles = emit_particles(
+                    2, start_x, start_y,
+                    JETPACK_COLORS[particle_rng.integers(0, len(JETPACK_COLORS), 2)],
+                    particle_rng.uniform(4, 7, 2),
+                    particle_rng.uniform(-20, 20, 2),
+                    particle_rng.uniform(50, 100, 2),
+                    -50, 0.3, additive=PARTICLE_ADDITIVE_JETPACK
+                )
                 self.jetpack_timer = 0.02
                 return particles
         else:
             self.can_collide = True  # Включаем коллизии в обычном состоянии
             self.anim_y_offset = math.sin(self.anim_timer) * 2.5
-            self.rect.bottom = self.base_y_on_lane + self.anim_y_offset
+            self.set_bottom(self.base_y_on_lane + self.anim_y_offset)
             self.target_tilt = math.sin(self.anim_timer * 0.8) * 4
 
-        self.rect.top = max(0, self.rect.top)
         self.draw_player_shape()
         return []
 
@@ -180,8 +294,7 @@ class Player(pygame.sprite.Sprite):
             self.current_lane_index = max(0, min(len(LANE_YS) - 1, self.current_lane_index + direction))
             if prev_lane_index != self.current_lane_index:
                 self.base_y_on_lane = LANE_YS[self.current_lane_index]
-                self.rect.bottom = self.base_y_on_lane + self.anim_y_offset
-                self.collision_rect.midbottom = (self.rect.centerx, self.base_y_on_lane)
+                self.set_bottom(self.base_y_on_lane + self.anim_y_offset)
                 self.target_tilt = direction * 18
 
     def jump(self):
@@ -193,13 +306,14 @@ class Player(pygame.sprite.Sprite):
             self.target_tilt = -20
             self.can_collide = False  # Отключаем коллизии при начале прыжка
 
-            return [Particle(
-                self.rect.centerx + random.uniform(-10, 10),
+            return emit_particles(
+                20,
+                self.rect.centerx + particle_rng.uniform(-10, 10, 20),
                 self.rect.bottom - self.image_buffer,
-                random.choice([(255, 220, 120), (255, 250, 180), (255, 255, 0)]),
-                random.uniform(4, 8),
-                random.uniform(-40, 40),
-                random.uniform(70, 120),
+                JUMP_COLORS[particle_rng.integers(0, len(JUMP_COLORS), 20)],
+                particle_rng.uniform(4, 8, 20),
+                particle_rng.uniform(-40, 40, 20),
+                particle_rng.uniform(70, 120, 20),
                 -120, 0.6
-            ) for _ in range(20)]
+            )
         return [] 
\ No newline at end of file
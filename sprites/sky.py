@@ -0,0 +1,183 @@
+import pygame
+import math
+import numpy as np
+from config import (SCREEN_WIDTH, WEATHER_TYPES, LANE_YS, PLAYER_SIZE, WHITE, YELLOW, STAR_COUNT,
+                   STAR_LAYERS, SUN_FADE_LEVELS)
+from utils.drawing import make_vertical_gradient
+from utils.rng import get_rng
+
+def get_sky_height():
+    # Небо рисуется только до дороги
+    return LANE_YS[0] - PLAYER_SIZE[1] * 0.8
+
+class SkyLayer:
+    # Градиент неба запекается один раз на каждый тип погоды,
+    # во время смены погоды два готовых градиента смешиваются через альфу
+    def __init__(self, width=SCREEN_WIDTH):
+        self.width = width
+        self.sky_height = get_sky_height()
+        self._gradients = {}
+
+    def get_gradient(self, weather):
+        if weather not in self._gradients:
+            colors = WEATHER_TYPES[weather]
+            self._gradients[weather] = make_vertical_gradient(self.width, int(self.sky_height), colors["sky_top"],
+                                                              colors["sky_bottom"], self.sky_height)
+        return self._gradients[weather]
+
+    def draw(self, surface, weather_system, offset_x=0, offset_y=0):
+        position = (offset_x, offset_y)
+        surface.blit(self.get_gradient(weather_system.current_weather), position)
+
+        if weather_system.next_weather is not None and weather_system.transition_progress < 1.0:
+            next_gradient = self.get_gradient(weather_system.next_weather)
+            next_gradient.set_alpha(int(255 * weather_system.transition_progress))
+            surface.blit(next_gradient, position)
+            next_gradient.set_alpha(None)
+
+class SunRenderer:
+    # Свечение и диск солнца собираются в один спрайт. Затухание на закате меняет
+    # альфу каждого кольца свечения отдельно, поэтому альфа квантуется на fade_levels
+    # уровней, и все уровни собираются заранее, чтобы при отрисовке ничего не создавалось
+    def __init__(self, sun_radius=40, fade_levels=SUN_FADE_LEVELS):
+        self.sun_radius = sun_radius
+        self.fade_levels = fade_levels
+        self._sprites = [self._build_sprite(int(255 * level / fade_levels)) for level in range(fade_levels + 1)]
+
+    def _build_sprite(self, sun_alpha):
+        sun_radius = self.sun_radius
+        size = int(sun_radius * 1.5) * 2
+        center = size // 2
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+        # Свечение
+        for r in range(int(sun_radius * 1.5), int(sun_radius * 0.8), -2):
+            alpha = int((255 * (1 - (r - sun_radius * 0.8) / (sun_radius * 0.7)) * sun_alpha) / 255)
+            alpha = max(0, min(255, alpha))
+            glow_surface = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
+            pygame.draw.circle(glow_surface, (*YELLOW, alpha), (r, r), r)
+            sprite.blit(glow_surface, (center - r, center - r))
+        # Само солнце
+        sun_surf_size = int(sun_radius * 1.6)
+        sun_surface = pygame.Surface((sun_surf_size, sun_surf_size), pygame.SRCALPHA)
+        pygame.draw.circle(sun_surface, (*YELLOW, sun_alpha), (sun_surf_size // 2, sun_surf_size // 2),
+                           int(sun_radius * 0.8))
+        sprite.blit(sun_surface, (center - sun_surf_size // 2, center - sun_surf_size // 2))
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        return sprite
+
+    def get_sprite(self, sun_alpha):
+        return self._sprites[round(sun_alpha * self.fade_levels / 255)]
+
+    def get_state(self, weather_system):
+        # Возвращает (x, y, альфа) солнца или None, если солнце не рисуется
+        current_weather = WEATHER_TYPES[weather_system.current_weather]
+        if (weather_system.next_weather is not None or not current_weather["sun_visible"]
+                or weather_system.current_weather == "sunrise"):
+            return None
+
+        road_rect_y = get_sky_height()
+        # Вычисляем позицию солнца с учетом прогресса текущей погоды
+        base_sun_position = current_weather["sun_position"]
+        progress = weather_system.weather_timer / weather_system.weather_duration
+        if weather_system.current_weather == "clear":
+            arc_radius = SCREEN_WIDTH * 0.35
+            cx = SCREEN_WIDTH // 2
+            cy = road_rect_y * 0.8
+            theta = math.pi - progress * math.pi
+            sun_x = cx + arc_radius * math.cos(theta)
+            sun_y = cy - arc_radius * math.sin(theta)
+            sun_alpha = 255
+        elif weather_system.current_weather == "sunset":
+            if progress < 0.8:
+                sun_x = SCREEN_WIDTH * 0.95
+                sun_y = road_rect_y * 0.85
+                sun_alpha = 255
+            else:
+                final_progress = (progress - 0.8) / 0.2
+                sun_x = SCREEN_WIDTH * 0.95
+                sun_y = road_rect_y * (0.85 + final_progress * 0.15)
+                sun_alpha = int(255 * (1 - final_progress))
+        else:
+            sun_x = SCREEN_WIDTH * 0.8
+            sun_y = road_rect_y * base_sun_position
+            sun_alpha = 255
+        return sun_x, sun_y, max(0, min(255, sun_alpha))
+
+    def draw(self, surface, weather_system, offset_x=0, offset_y=0):
+        state = self.get_state(weather_system)
+        if state is None:
+            return
+        sun_x, sun_y, sun_alpha = state
+        if sun_alpha <= 0:
+            return
+        sprite = self.get_sprite(sun_alpha)
+        half = sprite.get_width() // 2
+        surface.blit(sprite, (int(sun_x + offset_x) - half, int(sun_y + offset_y) - half))
+
+class StarField:
+    # Звезды разбиты на несколько слоёв с разной скоростью; каждый слой - готовая
+    # поверхность шириной в экран, которая прокручивается по кругу.
+    # Координаты звёзд слоя хранятся, чтобы в режиме грязных прямоугольников помечать только их
+    def __init__(self, count=STAR_COUNT, layers=STAR_LAYERS, width=SCREEN_WIDTH):
+        self.width = width
+        height = int(get_sky_height())
+        max_star_y = min(int(LANE_YS[0] * 0.8), height - 2)
+        rng = get_rng("stars")
+        self.layers = []
+        for layer_idx in range(layers):
+            speed_factor = 0.05 + 0.1 * (layer_idx + 0.5) / layers
+            surf = pygame.Surface((width, height))
+            surf.fill((0, 0, 0))
+            surf.set_colorkey((0, 0, 0))
+            xs, ys = [], []
+            for _ in range(count // layers):
+                x = rng.randint(0, width - 1)
+                y = rng.randint(0, max_star_y)
+                size = int(rng.uniform(0.5, 1.5))
+                if size >= 1:
+                    pygame.draw.circle(surf, WHITE, (x, y), size)
+                    xs.append(x)
+                    ys.append(y)
+            if pygame.display.get_surface() is not None:
+                surf = surf.convert()
+            self.layers.append({'surface': surf, 'speed_factor': speed_factor, 'offset': 0.0,
+                                'shown_offset': 0, 'xs': np.array(xs), 'ys': np.array(ys)})
+
+    def update(self, world_speed, dt):
+        for layer in self.layers:
+            layer['offset'] = (layer['offset'] + world_speed * layer['speed_factor'] * dt) % self.width
+
+    def get_moved_points(self):
+        # Экранные координаты звёзд тех слоёв, что сдвинулись на пиксель с прошлого вызова:
+        # и старые положения (их нужно стереть), и новые
+        xs, ys = [], []
+        for layer in self.layers:
+            shown_offset = int(layer['offset'])
+            if shown_offset != layer['shown_offset']:
+                for offset in (layer['shown_offset'], shown_offset):
+                    xs.append((layer['xs'] - offset) % self.width)
+                    ys.append(layer['ys'])
+                layer['shown_offset'] = shown_offset
+        if not xs:
+            return (), ()
+        return np.concatenate(xs), np.concatenate(ys)
+
+    def draw(self, surface, offset_x=0, offset_y=0):
+        for layer in self.layers:
+            x = offset_x - int(layer['offset'])
+            surface.blit(layer['surface'], (x, offset_y))
+            surface.blit(layer['surface'], (x + self.width, offset_y))
+
+    def draw_rects(self, surface, rects, bottom):
+        # То же, что draw(), но только внутри rects и выше bottom (ниже звёзды закрывает земля)
+        blits = []
+        for rect in rects:
+            rect = rect.clip((0, 0, self.width, bottom))
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+            for layer in self.layers:
+                x = int(layer['offset'])
+                blits.append((layer['surface'], rect, rect.move(x, 0)))
+                blits.append((layer['surface'], rect, rect.move(x - self.width, 0)))
+        surface.blits(blits, doreturn=False)
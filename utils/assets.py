@@ -0,0 +1,114 @@
+import os
+import json
+import zlib
+import pygame
+import config
+from config import ASSET_CACHE_DIR
+
+# Кэш процедурных поверхностей на диске: pixels.bin - сырые пиксели всех поверхностей подряд,
+# index.json - ключ кэша и для каждой поверхности (смещение, ширина, высота, формат).
+# pixels.bin читается целиком одним вызовом при запуске, поверхности создаются из него лениво
+# через frombuffer, без копирования. Ключ - crc32 от констант config.py, влияющих на рисунок,
+# версии pygame, шрифта бустеров и исходников модулей рисования: при их изменении кэш
+# перестаёт совпадать и запекается заново
+ASSET_CACHE_VERSION = 1
+ASSET_CONFIG_NAMES = [
+    "SCREEN_WIDTH", "SCREEN_HEIGHT", "LANE_YS", "PLAYER_SIZE", "BLUE_PLAYER", "PLAYER_TILT_STEP",
+    "PLAYER_EYE_PHASES", "OBSTACLE_BASE_SIZE", "RISK_COLORS", "BOOSTER_RADIUS", "BOOSTER_ANIM_FRAMES",
+    "POLICY_COLORS", "GROUND_COLOR_TOP", "GROUND_COLOR_BOTTOM", "BLACK", "RED",
+]
+ASSET_MODULES = ["sprites.player", "sprites.obstacles", "sprites.background"]
+
+_index = {}
+_pixels = None
+
+def get_cache_key():
+    from utils.fonts import resolve_font_path
+    values = [ASSET_CACHE_VERSION, pygame.version.ver, resolve_font_path("Impact")]
+    values += [(name, getattr(config, name)) for name in ASSET_CONFIG_NAMES]
+    crc = zlib.crc32(repr(values).encode("utf-8"))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for module in ASSET_MODULES:
+        with open(os.path.join(root, *module.split(".")) + ".py", "rb") as f:
+            crc = zlib.crc32(f.read(), crc)
+    return f"{crc:08x}"
+
+def _is_valid_entry(entry, size):
+    # [смещение, ширина, высота, формат], и поверхность целиком лежит в pixels.bin
+    if not isinstance(entry, list) or len(entry) != 4:
+        return False
+    offset, width, height, fmt = entry
+    if fmt not in ("RGBA", "RGB") or not all(isinstance(v, int) and v >= 0 for v in (offset, width, height)):
+        return False
+    return width > 0 and height > 0 and offset + width * height * len(fmt) <= size
+
+def load_assets(path=ASSET_CACHE_DIR):
+    # True, если кэш на диске есть и собран для текущей конфигурации.
+    # Повреждённый или отредактированный вручную кэш считается промахом и будет запечён заново
+    global _index, _pixels
+    _index, _pixels = {}, None
+    try:
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("key") != get_cache_key():
+            return False
+        entries = index["entries"]
+        pixels_path = os.path.join(path, "pixels.bin")
+        pixels = bytearray(os.path.getsize(pixels_path))
+        with open(pixels_path, "rb") as f:
+            if f.readinto(pixels) != len(pixels):
+                return False
+        if not all(_is_valid_entry(entry, len(pixels)) for entry in entries.values()):
+            return False
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return False
+    _index, _pixels = entries, memoryview(pixels)
+    return True
+
+def get_baked(name, build):
+    # Поверхность name из кэша на диске; если её там нет - build()
+    entry = _index.get(name)
+    if entry is None:
+        return build()
+    offset, width, height, fmt = entry
+    surface = pygame.image.frombuffer(_pixels[offset:offset + width * height * len(fmt)], (width, height), fmt)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert_alpha() if fmt == "RGBA" else surface.convert()
+    return surface
+
+def iter_assets():
+    # Все запекаемые поверхности: модули рисования отдают пары (имя, функция построения)
+    import importlib
+    for module in ASSET_MODULES:
+        yield from importlib.import_module(module).iter_baked_assets()
+
+def bake_assets(path=ASSET_CACHE_DIR):
+    # Отрисовать все поверхности и записать кэш; возвращает (число поверхностей, размер в байтах)
+    os.makedirs(path, exist_ok=True)
+    entries = {}
+    offset = 0
+    with open(os.path.join(path, "pixels.bin.tmp"), "wb") as f:
+        for name, build in iter_assets():
+            surface = build()
+            fmt = "RGBA" if surface.get_flags() & pygame.SRCALPHA else "RGB"
+            data = pygame.image.tobytes(surface, fmt)
+            f.write(data)
+            entries[name] = [offset, surface.get_width(), surface.get_height(), fmt]
+            offset += len(data)
+    with open(os.path.join(path, "index.json.tmp"), "w", encoding="utf-8") as f:
+        json.dump({"key": get_cache_key(), "entries": entries}, f)
+    os.replace(os.path.join(path, "pixels.bin.tmp"), os.path.join(path, "pixels.bin"))
+    os.replace(os.path.join(path, "index.json.tmp"), os.path.join(path, "index.json"))
+    load_assets(path)
+    return len(entries), offset
+
+def prepare_assets(path=ASSET_CACHE_DIR):
+    # При запуске: загрузить кэш, а если его нет или конфигурация изменилась - запечь заново.
+    # Без прав на запись игра работает и без кэша, рисуя поверхности на лету
+    if load_assets(path):
+        return
+    try:
+        count, size = bake_assets(path)
+        print(f"Запечено поверхностей: {count} ({size / 1024 / 1024:.1f} МБ) в {path}")
+    except OSError as e:
+        print(f"Кэш поверхностей не записан: {e}")
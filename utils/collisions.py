@@ -0,0 +1,37 @@
+import pygame
+from config import LANE_YS
+
+class LaneGroup(pygame.sprite.Group):
+    # Группа спрайтов с индексом по полосам: sprite.lane_index задаётся при появлении и не меняется.
+    # Индекс поддерживается в add/remove, поэтому kill() при уходе за экран убирает спрайт и из полосы
+    def __init__(self, *sprites):
+        self.lanes = [{} for _ in LANE_YS]
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.lanes[sprite.lane_index][sprite] = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        del self.lanes[sprite.lane_index][sprite]
+
+def get_player_lanes(player):
+    # На земле игрок задевает только свою полосу; в прыжке он пролетает над полосами выше своей
+    if player.can_collide:
+        return (player.current_lane_index,)
+    return range(player.current_lane_index + 1)
+
+def collide_lanes(player, group, lanes, dokill):
+    # Широкая фаза - спрайты нужных полос, пересекающиеся с игроком по прямоугольнику;
+    # узкая - попиксельная проверка по маскам (sprite.mask), построенным один раз на кадр спрайта
+    rect = player.rect
+    hits = []
+    for lane in lanes:
+        for sprite in group.lanes[lane]:
+            if rect.colliderect(sprite.rect) and pygame.sprite.collide_mask(player, sprite):
+                hits.append(sprite)
+    if dokill:
+        for sprite in hits:
+            sprite.kill()
+    return hits
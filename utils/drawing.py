@@ -1,52 +1,42 @@
 import pygame
-from config import BLACK
-
-def get_font(size, font_name_hint=None):
-    preferred_fonts = ['Consolas', 'Arial', 'Verdana']
-    if font_name_hint:
-        preferred_fonts.insert(0, font_name_hint)
-
-    for font_name in preferred_fonts:
-        try:
-            found_font_name = pygame.font.match_font(font_name)
-            if found_font_name:
-                return pygame.font.Font(found_font_name, size)
-        except:  # noqa
-            continue
-    return pygame.font.Font(None, size)
+import numpy as np
+from collections import OrderedDict
+from config import BLACK, PANEL_CACHE_SIZE, PANEL_CACHE_MAX_BYTES
+from utils.fonts import get_font, render_text
+
+# LRU-кэш готовых скруглённых панелей: (ширина, высота, цвет, радиус, альфа) -> Surface
+_panel_cache = OrderedDict()
+_panel_stats = {"hits": 0, "misses": 0, "bytes": 0}
 
 def draw_text(surface, text, size, x, y, color, font_name_hint=None, anchor="topleft", shadow=False, shadow_color=BLACK,
               shadow_offset=(1, 1)):
-    font = get_font(size, font_name_hint)
-    text_surface = font.render(text, True, color)
+    text_surface = render_text(text, size, color, font_name_hint)
     rect_params = {anchor: (x, y)}
     text_rect = text_surface.get_rect(**rect_params)
 
     if shadow:
-        shadow_surface = font.render(text, True, shadow_color)
+        shadow_surface = render_text(text, size, shadow_color, font_name_hint)
         shadow_rect = shadow_surface.get_rect(**rect_params)
         shadow_rect.x += shadow_offset[0]
         shadow_rect.y += shadow_offset[1]
         surface.blit(shadow_surface, shadow_rect)
     surface.blit(text_surface, text_rect)
 
-def draw_rounded_rect(surface, rect, color, corner_radius, alpha=255):
-    if corner_radius < 0:
-        raise ValueError(f"Corner radius {corner_radius} must be >= 0")
-
-    effective_rect_width = rect.width
-    effective_rect_height = rect.height
-
-    if effective_rect_width < 1 or effective_rect_height < 1:
-        return
-
-    if corner_radius > min(effective_rect_width, effective_rect_height) / 2:
-        corner_radius = min(effective_rect_width, effective_rect_height) / 2
-
-    corner_radius = max(0, corner_radius)
+def make_vertical_gradient(width, height, top_color, bottom_color, ratio_height=None):
+    # Строки градиента считаются векторно и копируются в поверхность одним вызовом
+    ratio = np.arange(height, dtype=np.float64) / (ratio_height or height)
+    top = np.asarray(top_color[:3], dtype=np.float64)
+    bottom = np.asarray(bottom_color[:3], dtype=np.float64)
+    rows = (top * (1 - ratio)[:, None] + bottom * ratio[:, None]).astype(np.uint8)
+    surf = pygame.Surface((width, height))
+    pygame.surfarray.blit_array(surf, np.broadcast_to(rows[None, :, :], (width, height, 3)).copy())
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert()
+    return surf
 
-    surf = pygame.Surface(rect.size, pygame.SRCALPHA)
-    fill_color_rgb = color[:3]
+def _build_rounded_panel(size, fill_color_rgb, corner_radius, alpha):
+    effective_rect_width, effective_rect_height = size
+    surf = pygame.Surface(size, pygame.SRCALPHA)
 
     pygame.draw.rect(surf, fill_color_rgb,
                      (0, corner_radius, effective_rect_width, effective_rect_height - 2 * corner_radius))
@@ -59,5 +49,47 @@ def draw_rounded_rect(surface, rect, color, corner_radius, alpha=255):
     pygame.draw.circle(surf, fill_color_rgb,
                        (effective_rect_width - corner_radius, effective_rect_height - corner_radius), corner_radius)
 
-    surf.set_alpha(alpha if len(color) == 3 else color[3])
-    surface.blit(surf, rect.topleft) 
\ No newline at end of file
+    surf.set_alpha(alpha)
+    return surf
+
+def get_rounded_panel(size, color, corner_radius, alpha=255):
+    # Поверхность из кэша общая - её нельзя изменять
+    width, height = size
+    if corner_radius > min(width, height) / 2:
+        corner_radius = min(width, height) / 2
+    corner_radius = max(0, corner_radius)
+    effective_alpha = alpha if len(color) == 3 else color[3]
+
+    key = (width, height, tuple(color[:3]), corner_radius, effective_alpha)
+    panel = _panel_cache.get(key)
+    if panel is not None:
+        _panel_cache.move_to_end(key)
+        _panel_stats["hits"] += 1
+        return panel
+
+    _panel_stats["misses"] += 1
+    panel = _build_rounded_panel((width, height), color[:3], corner_radius, effective_alpha)
+    _panel_cache[key] = panel
+    _panel_stats["bytes"] += width * height * panel.get_bytesize()
+    while len(_panel_cache) > PANEL_CACHE_SIZE or (len(_panel_cache) > 1
+                                                    and _panel_stats["bytes"] > PANEL_CACHE_MAX_BYTES):
+        _, evicted = _panel_cache.popitem(last=False)
+        _panel_stats["bytes"] -= evicted.get_width() * evicted.get_height() * evicted.get_bytesize()
+    return panel
+
+def get_panel_cache_stats():
+    return dict(_panel_stats, panels=len(_panel_cache))
+
+def clear_panel_cache():
+    _panel_cache.clear()
+    for key in _panel_stats:
+        _panel_stats[key] = 0
+
+def draw_rounded_rect(surface, rect, color, corner_radius, alpha=255):
+    if corner_radius < 0:
+        raise ValueError(f"Corner radius {corner_radius} must be >= 0")
+
+    if rect.width < 1 or rect.height < 1:
+        return
+
+    surface.blit(get_rounded_panel(rect.size, color, corner_radius, alpha), rect.topleft)
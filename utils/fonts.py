@@ -0,0 +1,76 @@
+import pygame
+from collections import OrderedDict
+from config import FONT_CACHE_SIZE, TEXT_CACHE_SIZE
+
+DEFAULT_FONTS = ['Consolas', 'Arial', 'Verdana']
+
+# Кэш путей к шрифтам: подсказка -> путь (None - встроенный шрифт pygame)
+_resolved_paths = {}
+# LRU-кэш объектов Font: (путь, размер) -> Font
+_font_cache = OrderedDict()
+# LRU-кэш отрендеренного текста: (текст, размер, подсказка, цвет, сглаживание) -> Surface
+_text_cache = OrderedDict()
+
+_stats = {"font_hits": 0, "font_misses": 0, "text_hits": 0, "text_misses": 0, "path_lookups": 0}
+
+def resolve_font_path(font_name_hint=None):
+    if font_name_hint in _resolved_paths:
+        return _resolved_paths[font_name_hint]
+
+    preferred_fonts = list(DEFAULT_FONTS)
+    if font_name_hint:
+        preferred_fonts.insert(0, font_name_hint)
+
+    _stats["path_lookups"] += 1
+    resolved = None
+    for font_name in preferred_fonts:
+        try:
+            found_font_name = pygame.font.match_font(font_name)
+            if found_font_name:
+                resolved = found_font_name
+                break
+        except:  # noqa
+            continue
+    _resolved_paths[font_name_hint] = resolved
+    return resolved
+
+def get_font(size, font_name_hint=None):
+    key = (resolve_font_path(font_name_hint), size)
+    font = _font_cache.get(key)
+    if font is not None:
+        _font_cache.move_to_end(key)
+        _stats["font_hits"] += 1
+        return font
+
+    _stats["font_misses"] += 1
+    font = pygame.font.Font(key[0], size)
+    _font_cache[key] = font
+    if len(_font_cache) > FONT_CACHE_SIZE:
+        _font_cache.popitem(last=False)
+    return font
+
+def render_text(text, size, color, font_name_hint=None, antialias=True):
+    # Возвращаемая поверхность общая для всех вызовов - её нельзя изменять
+    key = (text, size, font_name_hint, tuple(color), antialias)
+    text_surface = _text_cache.get(key)
+    if text_surface is not None:
+        _text_cache.move_to_end(key)
+        _stats["text_hits"] += 1
+        return text_surface
+
+    _stats["text_misses"] += 1
+    text_surface = get_font(size, font_name_hint).render(text, antialias, color)
+    _text_cache[key] = text_surface
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return text_surface
+
+def get_font_cache_stats():
+    return dict(_stats, fonts_cached=len(_font_cache), texts_cached=len(_text_cache))
+
+def clear_font_cache():
+    _resolved_paths.clear()
+    _font_cache.clear()
+    _text_cache.clear()
+    for key in _stats:
+        _stats[key] = 0
@@ -1,47 +1,171 @@
 import pygame
-import random
 import math
+import numpy as np
+from itertools import repeat
+from config import PARTICLE_CAPACITY, PARTICLE_COLOR_STEP
+from utils.rng import get_rng, get_np_rng
 
-class Particle:
-    def __init__(self, x, y, color, size, speed_x, speed_y, gravity, lifetime):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.size = size
-        self.speed_x = speed_x
-        self.speed_y = speed_y
-        self.gravity = gravity
-        self.lifetime = lifetime
-        self.life = 0
+# Поток случайных чисел для всех эмиттеров частиц (utils.rng)
+particle_rng = get_np_rng("particles")
+
+class ParticleBatch:
+    # Пачка новых частиц в виде массивов; добавляется в ParticleSystem через extend
+    def __init__(self, x, y, color, size, speed_x, speed_y, gravity, lifetime, additive=False):
+        self.x = np.asarray(x, dtype=np.float32)
+        count = len(self.x)
+        self.y = np.broadcast_to(np.asarray(y, dtype=np.float32), (count,))
+        self.color = np.broadcast_to(np.asarray(color, dtype=np.uint8), (count, 3))
+        self.size = np.broadcast_to(np.asarray(size, dtype=np.float32), (count,))
+        self.speed_x = np.broadcast_to(np.asarray(speed_x, dtype=np.float32), (count,))
+        self.speed_y = np.broadcast_to(np.asarray(speed_y, dtype=np.float32), (count,))
+        self.gravity = np.broadcast_to(np.asarray(gravity, dtype=np.float32), (count,))
+        self.lifetime = np.broadcast_to(np.asarray(lifetime, dtype=np.float32), (count,))
+        self.additive = np.broadcast_to(np.asarray(additive, dtype=bool), (count,))
+
+    def __len__(self):
+        return len(self.x)
+
+def emit_particles(count, x, y, color, size, speed_x, speed_y, gravity, lifetime, additive=False):
+    # Скалярные параметры растягиваются на все count частиц
+    x = np.broadcast_to(np.asarray(x, dtype=np.float32), (count,))
+    return ParticleBatch(x, y, color, size, speed_x, speed_y, gravity, lifetime, additive)
+
+class ParticleRenderer:
+    # Круги частиц заранее рисуются в спрайты по (радиус, квантованный цвет),
+    # а весь набор частиц выводится одним вызовом Surface.blits
+    def __init__(self, color_step=PARTICLE_COLOR_STEP):
+        self.color_step = color_step
+        self._sprites = {}
+
+    def get_sprite(self, radius, color, additive=False):
+        key = (radius, color, additive)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            # Спрайт на пиксель шире круга, чтобы совпадать с pygame.draw.circle в точке (x, y).
+            # Для аддитивных спрайтов фон черный (прибавление нуля ничего не меняет),
+            # для обычных - прозрачный цветовой ключ
+            sprite = pygame.Surface((radius * 2 + 2, radius * 2 + 2))
+            colorkey = (0, 0, 0) if additive else ((255, 0, 255) if color != (255, 0, 255) else (0, 255, 0))
+            sprite.fill(colorkey)
+            pygame.draw.circle(sprite, color, (radius + 1, radius + 1), radius)
+            if not additive:
+                sprite.set_colorkey(colorkey, pygame.RLEACCEL)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            self._sprites[key] = sprite
+        return sprite
+
+    def draw(self, particles, surface, offset_x=0, offset_y=0):
+        n = particles.count
+        if n == 0:
+            return
+        radii = particles.size[:n].astype(np.int32)
+        colors = particles.color[:n]
+        if self.color_step > 1:
+            colors = colors // self.color_step * self.color_step
+        additive = particles.additive[:n]
+        codes = (additive.astype(np.int64) << 32) | (radii.astype(np.int64) << 24) \
+            | (colors[:, 0].astype(np.int64) << 16) | (colors[:, 1].astype(np.int64) << 8) | colors[:, 2]
+        unique_codes, sprite_index = np.unique(codes, return_inverse=True)
+
+        sprites = np.empty(len(unique_codes), dtype=object)
+        for i, code in enumerate(unique_codes.tolist()):
+            sprites[i] = self.get_sprite((code >> 24) & 255, ((code >> 16) & 255, (code >> 8) & 255, code & 255),
+                                         bool(code >> 32))
+        flags = np.where(additive, pygame.BLEND_RGB_ADD, 0)
+
+        xs = ((particles.x[:n] + offset_x).astype(np.int32) - radii - 1).tolist()
+        ys = ((particles.y[:n] + offset_y).astype(np.int32) - radii - 1).tolist()
+        surface.blits(zip(sprites[sprite_index].tolist(), zip(xs, ys), repeat(None), flags.tolist()), doreturn=False)
+
+_default_renderer = ParticleRenderer()
+
+class ParticleSystem:
+    # Все живые частицы хранятся в массивах фиксированной ёмкости (structure of arrays).
+    # Живые частицы всегда занимают первые count ячеек
+    FIELDS = ("x", "y", "size", "speed_x", "speed_y", "gravity", "life", "lifetime", "color", "additive")
+
+    def __init__(self, capacity=PARTICLE_CAPACITY, renderer=None):
+        self.capacity = capacity
+        self.renderer = renderer or _default_renderer
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.speed_x = np.zeros(capacity, dtype=np.float32)
+        self.speed_y = np.zeros(capacity, dtype=np.float32)
+        self.gravity = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.additive = np.zeros(capacity, dtype=bool)
+        self.dropped = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def extend(self, batch):
+        if batch is None or len(batch) == 0:
+            return
+        start = self.count
+        n = min(len(batch), self.capacity - start)
+        self.dropped += len(batch) - n
+        if n <= 0:
+            return
+        end = start + n
+        self.x[start:end] = batch.x[:n]
+        self.y[start:end] = batch.y[:n]
+        self.size[start:end] = batch.size[:n]
+        self.speed_x[start:end] = batch.speed_x[:n]
+        self.speed_y[start:end] = batch.speed_y[:n]
+        self.gravity[start:end] = batch.gravity[:n]
+        self.life[start:end] = 0
+        self.lifetime[start:end] = batch.lifetime[:n]
+        self.color[start:end] = batch.color[:n]
+        self.additive[start:end] = batch.additive[:n]
+        self.count = end
 
     def update(self, dt):
-        self.life += dt
-        if self.life >= self.lifetime:
-            return False
+        n = self.count
+        if n == 0:
+            return
+        life = self.life[:n]
+        life += dt
+        speed_y = self.speed_y[:n]
+        speed_y += self.gravity[:n] * dt
+        self.x[:n] += self.speed_x[:n] * dt
+        self.y[:n] += speed_y * dt
+        size = self.size[:n]
+        np.maximum(size - 2 * dt, 1, out=size)
 
-        self.speed_y += self.gravity * dt
-        self.x += self.speed_x * dt
-        self.y += self.speed_y * dt
-        self.size = max(1, self.size - 2 * dt)
-        return True
+        alive = life < self.lifetime[:n]
+        dead = np.flatnonzero(~alive)
+        if dead.size:
+            self._swap_remove(dead, alive)
+
+    def _swap_remove(self, dead, alive):
+        # Живые частицы из хвоста переносятся на места умерших в начале массива
+        new_count = self.count - dead.size
+        holes = dead[dead < new_count]
+        movers = np.flatnonzero(alive[new_count:]) + new_count
+        if holes.size:
+            for name in self.FIELDS:
+                values = getattr(self, name)
+                values[holes] = values[movers]
+        self.count = new_count
 
     def draw(self, surface, offset_x=0, offset_y=0):
-        if self.size >= 1:
-            pygame.draw.circle(surface, self.color, (int(self.x + offset_x), int(self.y + offset_y)), int(self.size))
+        self.renderer.draw(self, surface, offset_x, offset_y)
 
 def create_explosion(x, y, color, count=20, base_speed=100, lifetime=0.5, gravity=300):
-    particles = []
-    for _ in range(count):
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(base_speed * 0.5, base_speed * 1.5)
-        speed_x = math.cos(angle) * speed
-        speed_y = math.sin(angle) * speed
-        size = random.uniform(3, 7)
-        p_color = (max(0, min(255, color[0] + random.randint(-20, 20))),
-                   max(0, min(255, color[1] + random.randint(-20, 20))),
-                   max(0, min(255, color[2] + random.randint(-20, 20))))
-        particles.append(Particle(x, y, p_color, size, speed_x, speed_y, gravity, lifetime))
-    return particles
+    angle = particle_rng.uniform(0, 2 * math.pi, count)
+    speed = particle_rng.uniform(base_speed * 0.5, base_speed * 1.5, count)
+    size = particle_rng.uniform(3, 7, count)
+    p_color = np.clip(np.asarray(color[:3]) + particle_rng.integers(-20, 21, (count, 3)), 0, 255)
+    return emit_particles(count, x, y, p_color, size, np.cos(angle) * speed, np.sin(angle) * speed, gravity, lifetime)
 
 # Глобальные переменные для эффектов
 screen_shake_amount = 0
@@ -58,6 +182,15 @@ def update_screen_shake(dt):
         screen_shake_timer -= dt
         if screen_shake_timer <= 0:
             screen_shake_amount = 0
-        return (random.randint(-screen_shake_amount, screen_shake_amount),
-                random.randint(-screen_shake_amount, screen_shake_amount))
-    return (0, 0) 
\ No newline at end of file
+        rng = get_rng("screen_shake")
+        return (rng.randint(-screen_shake_amount, screen_shake_amount),
+                rng.randint(-screen_shake_amount, screen_shake_amount))
+    return (0, 0)
+
+def reset_screen_shake():
+    global screen_shake_timer, screen_shake_amount
+    screen_shake_timer = 0
+    screen_shake_amount = 0
+
+def is_screen_shaking():
+    return screen_shake_timer > 0
@@ -0,0 +1,35 @@
+class SpritePool:
+    # Пул переиспользуемых спрайтов: acquire() достаёт свободный спрайт и вызывает у него reset(*args)
+    # вместо создания нового, release() возвращает спрайт в пул (лишние сверх max_free отдаются сборщику).
+    # Спрайт должен уметь reset(*args) с теми же аргументами, что и конструктор
+    def __init__(self, factory, max_free):
+        self.factory = factory
+        self.max_free = max_free
+        self.free = []
+        self.active = 0
+        # created - сколько спрайтов создано, reused - сколько созданий удалось избежать,
+        # high_water - максимум одновременно активных, dropped - не поместились в пул при возврате
+        self.stats = {"created": 0, "reused": 0, "high_water": 0, "dropped": 0}
+
+    def acquire(self, *args):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            self.stats["reused"] += 1
+        else:
+            sprite = self.factory(*args)
+            sprite.pool = self
+            self.stats["created"] += 1
+        self.active += 1
+        self.stats["high_water"] = max(self.stats["high_water"], self.active)
+        return sprite
+
+    def release(self, sprite):
+        self.active -= 1
+        if len(self.free) < self.max_free:
+            self.free.append(sprite)
+        else:
+            self.stats["dropped"] += 1
+
+    def get_stats(self):
+        return dict(self.stats, active=self.active, free=len(self.free))
@@ -0,0 +1,127 @@
+import json
+import time
+import pygame
+import numpy as np
+from collections import deque
+from config import PROFILER_WINDOW, PROFILER_OVERLAY_REFRESH_SEC, PROFILER_TRACE_MAX_EVENTS, UI_BG_COLOR
+from utils.fonts import get_font
+
+class FrameProfiler:
+    # Замер стадий кадра отсечками: lap(name) относит время с прошлой отсечки к стадии name.
+    # Стадия может встречаться в кадре несколько раз (шаги симуляции) - время суммируется.
+    # Выключенный профайлер сводится к одной проверке флага в lap()
+    def __init__(self, window=PROFILER_WINDOW, trace_path=None):
+        self.window = window
+        self.enabled = trace_path is not None
+        self.overlay_visible = False
+        self.trace_path = trace_path
+        self.trace_events = []
+        self.stages = {}  # стадия -> deque длительностей по кадрам, с
+        self.frame_times = deque(maxlen=window)
+        self._frame = {}
+        self._frame_start = 0.0
+        self._last = 0.0
+        self._trace_origin = time.perf_counter()
+        self._overlay = None
+        self._overlay_time = 0.0
+        # Дополнительные строки оверлея (например, статистика пулов спрайтов)
+        self.info = {}
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.enabled = self.overlay_visible or self.trace_path is not None
+        self._overlay = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._frame_start = self._last = time.perf_counter()
+        self._frame = {}
+
+    def lap(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        duration = now - self._last
+        self._frame[name] = self._frame.get(name, 0.0) + duration
+        if self.trace_path is not None and len(self.trace_events) < PROFILER_TRACE_MAX_EVENTS:
+            self.trace_events.append({"name": name, "ph": "X", "pid": 1, "tid": 1,
+                                      "ts": (self._last - self._trace_origin) * 1e6, "dur": duration * 1e6})
+        self._last = now
+
+    def set_info(self, name, text):
+        self.info[name] = text
+
+    def skip(self):
+        # Исключить время с прошлой отсечки из всех стадий (например, отрисовку самого оверлея)
+        if self.enabled:
+            self._last = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        for name, duration in self._frame.items():
+            samples = self.stages.get(name)
+            if samples is None:
+                samples = self.stages[name] = deque(maxlen=self.window)
+            samples.append(duration)
+        self.frame_times.append(time.perf_counter() - self._frame_start)
+        if self.trace_path is not None and len(self.trace_events) < PROFILER_TRACE_MAX_EVENTS:
+            self.trace_events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 0,
+                                      "ts": (self._frame_start - self._trace_origin) * 1e6,
+                                      "dur": self.frame_times[-1] * 1e6})
+
+    def get_stats(self):
+        # стадия -> (среднее, p99) в миллисекундах по скользящему окну
+        stats = {}
+        for name, samples in self.stages.items():
+            if samples:
+                values = np.fromiter(samples, dtype=np.float64) * 1000
+                stats[name] = (float(values.mean()), float(np.percentile(values, 99)))
+        return stats
+
+    def _build_overlay(self):
+        font = get_font(14)
+        stats = self.get_stats()
+        lines = [f"{'стадия':<16}{'сред':>8}{'p99':>8}  мс"]
+        for name, (mean, p99) in stats.items():
+            lines.append(f"{name:<16}{mean:>8.2f}{p99:>8.2f}")
+        if self.frame_times:
+            frame = np.fromiter(self.frame_times, dtype=np.float64) * 1000
+            lines.append(f"{'кадр':<16}{frame.mean():>8.2f}{np.percentile(frame, 99):>8.2f}")
+        for name, text in self.info.items():
+            lines.append(f"{name:<16}{text}")
+        rendered = [font.render(line, True, (230, 230, 230)) for line in lines]
+        line_height = font.get_linesize()
+        width = max(surface.get_width() for surface in rendered) + 12
+        overlay = pygame.Surface((width, line_height * len(rendered) + 10), pygame.SRCALPHA)
+        overlay.fill(UI_BG_COLOR)
+        for i, surface in enumerate(rendered):
+            overlay.blit(surface, (6, 5 + i * line_height))
+        return overlay
+
+    def get_overlay_rect(self, screen):
+        if not self.overlay_visible or self._overlay is None:
+            return None
+        return self._overlay.get_rect(bottomleft=(10, screen.get_height() - 10))
+
+    def update_overlay(self):
+        # Текст оверлея пересобирается несколько раз в секунду, а не каждый кадр
+        if not self.overlay_visible:
+            return
+        now = time.perf_counter()
+        if self._overlay is None or now - self._overlay_time >= PROFILER_OVERLAY_REFRESH_SEC:
+            self._overlay = self._build_overlay()
+            self._overlay_time = now
+
+    def draw_overlay(self, screen):
+        if self.overlay_visible and self._overlay is not None:
+            screen.blit(self._overlay, self.get_overlay_rect(screen))
+
+    def save_trace(self, path=None):
+        # Формат Chrome trace events: открывается в Perfetto и chrome://tracing
+        path = path or self.trace_path
+        if path is None:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f)
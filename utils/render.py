@@ -0,0 +1,101 @@
+import pygame
+import numpy as np
+from config import DIRTY_TILE_SIZE, DIRTY_RECT_MAX_COVERAGE
+
+class DirtyRectTracker:
+    # Грязные области копятся в грубой сетке клеток. Область, где что-то было нарисовано
+    # в прошлом кадре, тоже восстанавливается в текущем, чтобы стереть старое положение
+    def __init__(self, size, tile_size=DIRTY_TILE_SIZE, max_coverage=DIRTY_RECT_MAX_COVERAGE):
+        self.width, self.height = size
+        self.screen_rect = pygame.Rect(0, 0, self.width, self.height)
+        self.tile_size = tile_size
+        self.max_coverage = max_coverage
+        self.cols = -(-self.width // tile_size)
+        self.rows = -(-self.height // tile_size)
+        self.tiles = np.zeros((self.rows, self.cols), dtype=bool)
+        self.prev_tiles = np.zeros_like(self.tiles)
+        self.full = True
+        self.stats = {"frames": 0, "full_frames": 0, "rects": 0, "dirty_area": 0}
+
+    def force_full(self):
+        self.full = True
+
+    def mark(self, rect):
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        ts = self.tile_size
+        self.tiles[rect.top // ts:(rect.bottom - 1) // ts + 1, rect.left // ts:(rect.right - 1) // ts + 1] = True
+
+    def mark_points(self, xs, ys, radius):
+        # Массовая пометка точек (частиц); radius не больше размера клетки
+        if len(xs) == 0:
+            return
+        ts = self.tile_size
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        for dx in (-radius, radius):
+            cols = ((xs + dx) // ts).astype(np.int32)
+            for dy in (-radius, radius):
+                rows = ((ys + dy) // ts).astype(np.int32)
+                inside = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+                self.tiles[rows[inside], cols[inside]] = True
+
+    def coverage(self):
+        return np.count_nonzero(self.tiles | self.prev_tiles) / self.tiles.size
+
+    def needs_full(self):
+        return self.full or self.coverage() > self.max_coverage
+
+    def get_rects(self):
+        # Клетки склеиваются в горизонтальные отрезки, одинаковые отрезки соседних строк - в прямоугольники
+        if self.needs_full():
+            return [self.screen_rect.copy()]
+        mask = self.tiles | self.prev_tiles
+        ts = self.tile_size
+        rects = []
+        open_runs = {}
+        for row in range(self.rows):
+            padded = np.concatenate(([False], mask[row], [False]))
+            edges = np.flatnonzero(padded[1:] != padded[:-1])
+            runs = set(zip(edges[::2].tolist(), edges[1::2].tolist()))
+            next_open = {}
+            for run in runs:
+                if run in open_runs:
+                    next_open[run] = open_runs.pop(run)
+                else:
+                    next_open[run] = row
+            for (start, end), start_row in open_runs.items():
+                rects.append(pygame.Rect(start * ts, start_row * ts, (end - start) * ts, (row - start_row) * ts))
+            open_runs = next_open
+        for (start, end), start_row in open_runs.items():
+            rects.append(pygame.Rect(start * ts, start_row * ts, (end - start) * ts, (self.rows - start_row) * ts))
+        return [rect.clip(self.screen_rect) for rect in rects]
+
+    def end_frame(self, rects):
+        self.stats["frames"] += 1
+        if len(rects) == 1 and rects[0] == self.screen_rect:
+            self.stats["full_frames"] += 1
+        self.stats["rects"] += len(rects)
+        self.stats["dirty_area"] += sum(rect.width * rect.height for rect in rects)
+        self.prev_tiles, self.tiles = self.tiles, self.prev_tiles
+        self.tiles[:] = False
+        self.full = False
+
+class CachedBackground:
+    # Закэшированная копия статичных слоёв (небо, солнце, земля, дорога).
+    # draw_func(surface) рисует их целиком, а перерисовка ограничивается клипом по изменившимся областям
+    def __init__(self, size, draw_func):
+        self.surface = pygame.Surface(size)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.draw_func = draw_func
+
+    def redraw(self, rects):
+        for rect in rects:
+            self.surface.set_clip(rect)
+            self.draw_func(self.surface)
+        self.surface.set_clip(None)
+
+    def restore(self, screen, rects):
+        screen.blits([(self.surface, rect, rect) for rect in rects], doreturn=False)
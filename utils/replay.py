@@ -0,0 +1,117 @@
+import struct
+import zlib
+
+# Формат записи: заголовок фиксированной длины и тело со списком действий.
+# Заголовок: магия, версия, флаги, частота симуляции, seed, контрольная сумма параметров.
+# Тело: на каждое действие - разница в шагах симуляции от предыдущего действия (varint)
+# и код действия (1 байт); в конце маркер END с шагом окончания записи.
+# С флагом REPLAY_COMPRESSED тело сжато zlib.
+# Запись воспроизводит симуляцию (simulation.GameSimulation), а также погоду и смену земли,
+# которые идут на том же фиксированном шаге. Частицы, параллакс и тряска экрана зависят
+# от длительности кадров, которая не записывается, и совпадают с записью лишь приблизительно
+REPLAY_MAGIC = b"RRPL"
+REPLAY_VERSION = 2  # 2: попиксельные столкновения по полосам
+REPLAY_COMPRESSED = 1
+_HEADER = struct.Struct("<4sBBHQI")
+
+ACTION_CODES = {"up": 1, "down": 2, "jump": 3}
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+_END = 0
+
+def params_checksum(params):
+    # Запись воспроизводима только с теми же параметрами баланса
+    return zlib.crc32(repr(sorted(params.items())).encode("utf-8"))
+
+def _write_varint(out, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+class Replay:
+    def __init__(self, seed, sim_hz, params_crc, actions=None, end_step=None):
+        self.seed = seed
+        self.sim_hz = sim_hz
+        self.params_crc = params_crc
+        self.actions = actions if actions is not None else []  # [(шаг, действие)], шаги не убывают
+        self.end_step = end_step
+        self._cursor = 0
+
+    def record(self, step, action):
+        self.actions.append((step, action))
+
+    def finish(self, step):
+        self.end_step = step
+
+    def rewind(self):
+        self._cursor = 0
+
+    def pop_actions(self, step):
+        # Действия, которые нужно применить перед шагом симуляции step
+        actions = []
+        while self._cursor < len(self.actions) and self.actions[self._cursor][0] <= step:
+            actions.append(self.actions[self._cursor][1])
+            self._cursor += 1
+        return actions
+
+    def to_bytes(self, compress=False):
+        body = bytearray()
+        last_step = 0
+        for step, action in self.actions:
+            _write_varint(body, step - last_step)
+            body.append(ACTION_CODES[action])
+            last_step = step
+        end_step = self.end_step if self.end_step is not None else last_step
+        _write_varint(body, end_step - last_step)
+        body.append(_END)
+        flags = REPLAY_COMPRESSED if compress else 0
+        if compress:
+            body = zlib.compress(bytes(body), 9)
+        header = _HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, flags, self.sim_hz, self.seed, self.params_crc)
+        return header + bytes(body)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, flags, sim_hz, seed, params_crc = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ValueError("Файл не является записью Risk Rush")
+        if version != REPLAY_VERSION:
+            raise ValueError(f"Неподдерживаемая версия записи: {version}")
+        body = data[_HEADER.size:]
+        if flags & REPLAY_COMPRESSED:
+            body = zlib.decompress(body)
+
+        actions = []
+        step = pos = 0
+        while True:
+            delta, pos = _read_varint(body, pos)
+            code = body[pos]
+            pos += 1
+            step += delta
+            if code == _END:
+                break
+            actions.append((step, ACTION_NAMES[code]))
+        return cls(seed, sim_hz, params_crc, actions, step)
+
+    def save(self, path, compress=False):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes(compress))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
@@ -0,0 +1,45 @@
+import random
+import zlib
+import numpy as np
+
+# Именованные потоки случайных чисел: у каждой подсистемы свой поток, поэтому
+# лишний вызов в одной (например, частицы, зависящие от FPS) не сдвигает остальные.
+# Потоки - долгоживущие объекты; seed_streams пересевает их на месте, так что ссылки,
+# полученные при импорте модулей, остаются действительными
+_seed = None
+_streams = {}
+_np_streams = {}
+
+def _stream_seed(name):
+    return [_seed, zlib.crc32(name.encode("utf-8"))]
+
+def seed_streams(seed):
+    # seed=None - недетерминированные потоки (обычная игра без записи)
+    global _seed
+    _seed = seed
+    for name, stream in _streams.items():
+        stream.seed(None if seed is None else f"{seed}:{name}")
+    for name, stream in _np_streams.items():
+        stream.bit_generator.state = _new_np_generator(name).bit_generator.state
+
+def get_seed():
+    return _seed
+
+def _new_np_generator(name):
+    return np.random.default_rng(None if _seed is None else _stream_seed(name))
+
+def get_rng(name):
+    # random.Random для подсистемы name
+    stream = _streams.get(name)
+    if stream is None:
+        stream = random.Random(None if _seed is None else f"{_seed}:{name}")
+        _streams[name] = stream
+    return stream
+
+def get_np_rng(name):
+    # numpy Generator для подсистемы name
+    stream = _np_streams.get(name)
+    if stream is None:
+        stream = _new_np_generator(name)
+        _np_streams[name] = stream
+    return stream
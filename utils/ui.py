@@ -3,53 +3,169 @@ from config import (UI_BG_COLOR, UI_TEXT_COLOR, GREEN, YELLOW, RED, WHITE, BLACK
                    TOAST_BG_COLOR, TOAST_TEXT_COLOR, LIGHT_GREY)
 from utils.drawing import draw_text, draw_rounded_rect, get_font
 
-def draw_timer(screen, time_left, ui_padding=10, ui_element_height=40, ui_corner_radius=8):
+def render_timer(screen_width, time_left, ui_padding=10, ui_element_height=40, ui_corner_radius=8):
     mins, secs = divmod(int(time_left), 60)
     timer_text = f"{mins:02}:{secs:02}"
     timer_font = get_font(28, 'Digital-7, Consolas')
     timer_text_size = timer_font.size(timer_text)
-    timer_bg_rect = pygame.Rect(screen.get_width() / 2 - timer_text_size[0] / 2 - ui_padding, ui_padding,
+    timer_bg_rect = pygame.Rect(screen_width / 2 - timer_text_size[0] / 2 - ui_padding, ui_padding,
                                 timer_text_size[0] + ui_padding * 2, ui_element_height)
-    draw_rounded_rect(screen, timer_bg_rect, UI_BG_COLOR, ui_corner_radius)
-    draw_text(screen, timer_text, 28, screen.get_width() / 2, ui_padding + (ui_element_height - timer_text_size[1]) / 2,
+    widget = pygame.Surface(timer_bg_rect.size, pygame.SRCALPHA)
+    draw_rounded_rect(widget, widget.get_rect(), UI_BG_COLOR, ui_corner_radius)
+    draw_text(widget, timer_text, 28, screen_width / 2 - timer_bg_rect.x, (ui_element_height - timer_text_size[1]) / 2,
               UI_TEXT_COLOR, font_name_hint='Digital-7, Consolas', anchor="midtop", shadow=True,
               shadow_color=(0, 0, 0, 100))
+    return widget, timer_bg_rect
 
-def draw_score(screen, score, ui_padding=10, ui_element_height=40, ui_corner_radius=8):
+def render_score(screen_width, score, ui_padding=10, ui_element_height=40, ui_corner_radius=8):
     score_text = f"Экономия: {score:,} ₽"
     score_font = get_font(24, 'Verdana')
     score_text_size = score_font.size(score_text)
-    score_bg_rect = pygame.Rect(screen.get_width() - score_text_size[0] - ui_padding * 3, ui_padding,
+    score_bg_rect = pygame.Rect(screen_width - score_text_size[0] - ui_padding * 3, ui_padding,
                                 score_text_size[0] + ui_padding * 2, ui_element_height)
-    draw_rounded_rect(screen, score_bg_rect, UI_BG_COLOR, ui_corner_radius)
-    draw_text(screen, score_text, 24, screen.get_width() - ui_padding * 2,
-              ui_padding + (ui_element_height - score_text_size[1]) / 2, GREEN, font_name_hint='Verdana',
+    widget = pygame.Surface(score_bg_rect.size, pygame.SRCALPHA)
+    draw_rounded_rect(widget, widget.get_rect(), UI_BG_COLOR, ui_corner_radius)
+    draw_text(widget, score_text, 24, screen_width - ui_padding * 2 - score_bg_rect.x,
+              (ui_element_height - score_text_size[1]) / 2, GREEN, font_name_hint='Verdana',
               anchor="topright", shadow=True)
+    return widget, score_bg_rect
 
-def draw_health(screen, health, initial_health, ui_padding=10, ui_element_height=40, ui_corner_radius=8):
+def render_health(health, initial_health, ui_padding=10, ui_element_height=40, ui_corner_radius=8):
     health_text = "Бюджет: " + "❤️" * health + "🖤" * (initial_health - health)
     health_font = get_font(24)
     health_text_size = health_font.size(health_text)
     health_bg_rect = pygame.Rect(ui_padding, ui_padding, health_text_size[0] + ui_padding * 2, ui_element_height)
-    draw_rounded_rect(screen, health_bg_rect, UI_BG_COLOR, ui_corner_radius)
+    widget = pygame.Surface(health_bg_rect.size, pygame.SRCALPHA)
+    draw_rounded_rect(widget, widget.get_rect(), UI_BG_COLOR, ui_corner_radius)
     health_color = RED if health <= 1 else (YELLOW if health == 2 else GREEN)
-    draw_text(screen, health_text, 24, ui_padding * 2, ui_padding + (ui_element_height - health_text_size[1]) / 2,
+    draw_text(widget, health_text, 24, ui_padding, (ui_element_height - health_text_size[1]) / 2,
               health_color, shadow=True)
+    return widget, health_bg_rect
+
+def render_active_policy(screen_width, active_policy, policy_colors, ui_padding=10, ui_element_height=40, y_offset=0):
+    policy_text = f"АКТИВЕН: {active_policy.upper()}"
+    policy_font = get_font(20, 'Impact, Arial Black')
+    policy_color = policy_colors.get(active_policy, WHITE)
+    policy_text_size = policy_font.size(policy_text)
+    policy_bg_rect = pygame.Rect(screen_width / 2 - policy_text_size[0] / 2 - ui_padding,
+                                 ui_padding * 2 + ui_element_height + y_offset,
+                                 policy_text_size[0] + ui_padding * 2,
+                                 int(ui_element_height * 0.8))
+    widget = pygame.Surface(policy_bg_rect.size, pygame.SRCALPHA)
+    draw_rounded_rect(widget, widget.get_rect(), (*policy_color, 180), 6, alpha=200)
+    draw_text(widget, policy_text, 20, screen_width / 2 - policy_bg_rect.x,
+              (int(ui_element_height * 0.8) - policy_text_size[1]) / 2,
+              WHITE, font_name_hint='Impact, Arial Black', anchor="midtop", shadow=True, shadow_color=BLACK)
+    return widget, policy_bg_rect
+
+def draw_timer(screen, time_left, ui_padding=10, ui_element_height=40, ui_corner_radius=8):
+    widget, rect = render_timer(screen.get_width(), time_left, ui_padding, ui_element_height, ui_corner_radius)
+    screen.blit(widget, rect)
+
+def draw_score(screen, score, ui_padding=10, ui_element_height=40, ui_corner_radius=8):
+    widget, rect = render_score(screen.get_width(), score, ui_padding, ui_element_height, ui_corner_radius)
+    screen.blit(widget, rect)
+
+def draw_health(screen, health, initial_health, ui_padding=10, ui_element_height=40, ui_corner_radius=8):
+    widget, rect = render_health(health, initial_health, ui_padding, ui_element_height, ui_corner_radius)
+    screen.blit(widget, rect)
 
 def draw_active_policy(screen, active_policy, policy_colors, ui_padding=10, ui_element_height=40, y_offset=0):
     if active_policy:
-        policy_text = f"АКТИВЕН: {active_policy.upper()}"
-        policy_font = get_font(20, 'Impact, Arial Black')
-        policy_color = policy_colors.get(active_policy, WHITE)
-        policy_text_size = policy_font.size(policy_text)
-        policy_bg_rect = pygame.Rect(screen.get_width() / 2 - policy_text_size[0] / 2 - ui_padding,
-                                     ui_padding * 2 + ui_element_height + y_offset,
-                                     policy_text_size[0] + ui_padding * 2,
-                                     int(ui_element_height * 0.8))
-        draw_rounded_rect(screen, policy_bg_rect, (*policy_color, 180), 6, alpha=200)
-        draw_text(screen, policy_text, 20, screen.get_width() / 2,
-                  ui_padding * 2 + ui_element_height + y_offset + (int(ui_element_height * 0.8) - policy_text_size[1]) / 2,
-                  WHITE, font_name_hint='Impact, Arial Black', anchor="midtop", shadow=True, shadow_color=BLACK)
+        widget, rect = render_active_policy(screen.get_width(), active_policy, policy_colors, ui_padding,
+                                            ui_element_height, y_offset)
+        screen.blit(widget, rect)
+
+class HUDWidget:
+    # Хранит готовую поверхность виджета и перерисовывает её только при смене входного значения
+    def __init__(self, render_func):
+        self.render_func = render_func
+        self.key = None
+        self.surface = None
+        self.rect = None
+        self.changed = False
+
+    def update(self, key, *args):
+        if self.surface is not None and key == self.key:
+            self.changed = False
+            return False
+        self.surface, self.rect = self.render_func(*args)
+        self.key = key
+        self.changed = True
+        return True
+
+    def draw(self, screen):
+        if self.surface is not None:
+            screen.blit(self.surface, self.rect)
+
+class HUD:
+    def __init__(self, policy_spacing=45):
+        self.policy_spacing = policy_spacing
+        self.timer = HUDWidget(render_timer)
+        self.score = HUDWidget(render_score)
+        self.health = HUDWidget(render_health)
+        self.policies = []
+
+    def update(self, screen_width, time_left, score, health, initial_health, active_policies, policy_colors):
+        # Возвращает прямоугольники, которые изменились (старое и новое положение виджетов)
+        widgets = [self.timer, self.score, self.health] + self.policies
+        old_rects = [widget.rect for widget in widgets]
+        self.timer.update((screen_width, int(time_left)), screen_width, time_left)
+        self.score.update((screen_width, score), screen_width, score)
+        self.health.update((health, initial_health), health, initial_health)
+
+        while len(self.policies) < len(active_policies):
+            self.policies.append(HUDWidget(render_active_policy))
+        del self.policies[len(active_policies):]
+        for i, policy in enumerate(active_policies):
+            y_offset = i * self.policy_spacing
+            self.policies[i].update((screen_width, policy, y_offset), screen_width, policy, policy_colors,
+                                    10, 40, y_offset)
+
+        new_widgets = [self.timer, self.score, self.health] + self.policies
+        dirty_rects = []
+        for i in range(max(len(widgets), len(new_widgets))):
+            old_rect = old_rects[i] if i < len(widgets) else None
+            new_widget = new_widgets[i] if i < len(new_widgets) else None
+            if i < len(widgets) and new_widget is widgets[i] and not new_widget.changed:
+                continue
+            if old_rect is not None:
+                dirty_rects.append(old_rect)
+            if new_widget is not None and new_widget.rect is not None:
+                dirty_rects.append(new_widget.rect)
+        return dirty_rects
+
+    def get_widgets(self):
+        return [self.timer, self.score, self.health] + self.policies
+
+    def draw_widgets(self, screen, clip_rects=None):
+        # Без clip_rects рисуются все виджеты, иначе только пересекающие эти прямоугольники
+        for widget in self.get_widgets():
+            if widget.rect is None:
+                continue
+            if clip_rects is None or widget.rect.collidelist(clip_rects) != -1:
+                widget.draw(screen)
+
+    def draw(self, screen, time_left, score, health, initial_health, active_policies, policy_colors):
+        self.update(screen.get_width(), time_left, score, health, initial_health, active_policies, policy_colors)
+        self.draw_widgets(screen)
+
+def get_toast_rect(screen, message):
+    # Прямоугольник, который займёт всплывающее сообщение (совпадает с раскладкой draw_toast)
+    if not message:
+        return None
+    toast_font = get_font(20)
+    max_line_width = 0
+    line_height_total = 0
+    for i, line in enumerate(message.split("! ")):
+        if i > 0:
+            line = "! " + line
+        width, height = toast_font.size(line)
+        max_line_width = max(max_line_width, width)
+        line_height_total += height + (5 if i > 0 else 0)
+    rect = pygame.Rect(0, 0, max_line_width + 40, line_height_total + 20)
+    rect.midbottom = (screen.get_width() / 2, screen.get_height() - 20)
+    return rect
 
 def draw_toast(screen, message, end_time, alpha, current_time):
     if not message: